@@ -0,0 +1,30 @@
+"""add_capacity_to_rooms
+
+Revision ID: 5f3a9c1d7e42
+Revises: 8b41d2e6f0a7
+Create Date: 2026-10-17 14:03:27.914512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3a9c1d7e42'
+down_revision: Union[str, Sequence[str], None] = '8b41d2e6f0a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Add capacity column to rooms table; NULL means the server-wide default applies
+    op.add_column('rooms', sa.Column('capacity', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Remove capacity column from rooms table
+    op.drop_column('rooms', 'capacity')
@@ -0,0 +1,42 @@
+"""add_mode_and_presenters_to_rooms
+
+Revision ID: 8b41d2e6f0a7
+Revises: 3c9ae0ef7b40
+Create Date: 2026-10-17 10:12:41.508233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41d2e6f0a7'
+down_revision: Union[str, Sequence[str], None] = '3c9ae0ef7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Add mode column to rooms table; existing rooms are meetings
+    op.add_column('rooms', sa.Column('mode', sa.String(), nullable=False, server_default='meeting'))
+    
+    # Create room_presenters association table
+    op.create_table(
+        'room_presenters',
+        sa.Column('room_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Drop room_presenters association table
+    op.drop_table('room_presenters')
+    
+    # Remove mode column from rooms table
+    op.drop_column('rooms', 'mode')
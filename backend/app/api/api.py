@@ -1,9 +1,10 @@
 from fastapi import APIRouter
-from app.api import auth, rooms
+from app.api import auth, rooms, ice
 
 api_router = APIRouter()
 api_router.include_router(auth.router)
 api_router.include_router(rooms.router)
+api_router.include_router(ice.router)
 
 @api_router.get("/")
 async def root():
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends
+import base64
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.auth_middleware import get_current_user
+from app.models.database_models import User
+from app.schemas.ice import IceConfig
+
+router = APIRouter(prefix="/ice", tags=["ICE"])
+
+def split_urls(value: str) -> List[str]:
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+class IceConfigProvider:
+    """
+    Builds RTCPeerConnection ICE configuration with time-limited TURN REST
+    credentials (username "<expiry>:<user>", HMAC-SHA1 of it with the shared
+    secret, as coturn's use-auth-secret expects). A user's credentials are
+    reused until only refresh_fraction of their lifetime is left.
+    """
+    
+    def __init__(self, secret: Optional[str] = None, ttl: Optional[int] = None,
+                 refresh_fraction: Optional[float] = None, max_cached: Optional[int] = None):
+        # The signing key is encoded once and kept in memory
+        secret = settings.TURN_SECRET if secret is None else secret
+        self._key = secret.encode() if secret else None
+        self.ttl = ttl or settings.TURN_CREDENTIAL_TTL
+        self.refresh_fraction = settings.TURN_REFRESH_FRACTION if refresh_fraction is None else refresh_fraction
+        self.max_cached = max_cached or settings.TURN_CACHE_SIZE
+        self.stun_urls = split_urls(settings.STUN_URLS)
+        self.turn_urls = split_urls(settings.TURN_URLS)
+        # username -> (expiry, config), least recently issued first
+        self._cache: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict()
+    
+    def get(self, username: str) -> Dict:
+        """ICE configuration for a user, with the remaining credential lifetime as ttl"""
+        now = int(time.time())
+        cached = self._cache.get(username)
+        if cached is None or cached[0] - now < self.ttl * self.refresh_fraction:
+            cached = self._issue(username, now)
+        
+        expiry, config = cached
+        return {**config, "ttl": expiry - now}
+    
+    def _issue(self, username: str, now: int) -> Tuple[int, Dict]:
+        expiry = now + self.ttl
+        ice_servers = []
+        if self.stun_urls:
+            ice_servers.append({"urls": self.stun_urls})
+        if self.turn_urls and self._key is not None:
+            turn_username = f"{expiry}:{username}"
+            digest = hmac.new(self._key, turn_username.encode(), hashlib.sha1).digest()
+            ice_servers.append({
+                "urls": self.turn_urls,
+                "username": turn_username,
+                "credential": base64.b64encode(digest).decode()
+            })
+        
+        entry = (expiry, {"iceServers": ice_servers})
+        self._cache.pop(username, None)
+        self._cache[username] = entry
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return entry
+
+ice_config_provider = IceConfigProvider()
+
+@router.get("/", response_model=IceConfig)
+async def get_ice_config(current_user: User = Depends(get_current_user)):
+    """ICE servers for RTCPeerConnection, including short-lived TURN credentials"""
+    return ice_config_provider.get(str(current_user.username))
@@ -16,6 +16,12 @@ except ImportError:
             
         def observe(self, *args, **kwargs):
             pass
+
+        def set(self, *args, **kwargs):
+            pass
+
+        def dec(self, *args, **kwargs):
+            pass
     
     generate_latest = lambda: b""
     CONTENT_TYPE_LATEST = "text/plain"
@@ -35,6 +41,69 @@ ACTIVE_CONNECTIONS = Gauge('active_websocket_connections', 'Number of active Web
 ACTIVE_ROOMS = Gauge('active_rooms', 'Number of active rooms')
 ONLINE_USERS = Gauge('online_users', 'Number of online users')
 
+# Signaling metrics
+BROADCAST_DURATION = Histogram('signaling_broadcast_duration_seconds', 'Time to fan a message out to a room',
+                               buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+BROADCAST_FAILURES = Counter('signaling_broadcast_failures_total', 'Recipients whose outbound queue refused a broadcast')
+OUTBOUND_QUEUE_DEPTH = Gauge('signaling_outbound_queue_depth', 'Messages waiting in per-connection outbound queues')
+OUTBOUND_LANE_LATENCY = Histogram('signaling_outbound_lane_latency_seconds', 'Time from enqueue to written, per priority lane',
+                                  ['lane'], buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+OUTBOUND_DROPS = Counter('signaling_outbound_drops_total', 'Outbound messages discarded before sending', ['reason'])
+CANDIDATES_RECEIVED = Counter('signaling_ice_candidates_received_total', 'Trickled ICE candidates received from clients')
+CANDIDATE_BATCHES_SENT = Counter('signaling_ice_candidate_batches_sent_total', 'Coalesced ICE candidate messages forwarded')
+BACKPLANE_MESSAGES = Counter('signaling_backplane_messages_total', 'Envelopes exchanged with other nodes', ['direction'])
+ROOMS_OWNED = Gauge('signaling_rooms_owned', 'Rooms this node owns in the room directory')
+ROOM_ROUTES = Counter('signaling_room_routes_total', 'Where new connections were served', ['result'])
+PROXIED_CONNECTIONS = Gauge('signaling_proxied_connections', 'Client sockets piped to the node owning their room')
+PRESENCE_PENDING = Gauge('signaling_presence_journal_pending', 'Presence changes waiting to be written to the database')
+PRESENCE_FLUSH_DURATION = Histogram('signaling_presence_flush_duration_seconds', 'Time to apply a batch of presence changes')
+PRESENCE_FLUSH_ERRORS = Counter('signaling_presence_flush_errors_total', 'Presence journal flushes that failed')
+LIVENESS_TRACKED = Gauge('signaling_liveness_tracked_connections', 'Connections tracked for idle detection')
+LIVENESS_PINGS = Counter('signaling_liveness_pings_total', 'Pings sent to connections that went quiet')
+LIVENESS_EVICTIONS = Counter('signaling_liveness_evictions_total', 'Connections closed for exceeding the idle deadline')
+PRESENCE_EVENTS = Counter('signaling_presence_events_total', 'Joins and leaves seen by the presence coalescer')
+ROSTER_DELTAS_SENT = Counter('signaling_roster_deltas_sent_total', 'Coalesced roster_delta messages broadcast to rooms')
+SESSION_RESUMES = Counter('signaling_session_resumes_total', 'Session resume outcomes', ['result'])
+REPLAYED_MESSAGES = Counter('signaling_replayed_messages_total', 'Messages replayed to resumed sessions')
+SFU_PUBLISHERS = Gauge('signaling_sfu_publishers', 'Upstream peer connections held by the SFU')
+SFU_SUBSCRIPTIONS = Gauge('signaling_sfu_subscriptions', 'Downstream peer connections held by the SFU')
+SFU_SUBSCRIPTIONS_REFUSED = Counter('signaling_sfu_subscriptions_refused_total', 'Downstream peer connections refused at the per-node cap')
+TOPOLOGY_SWITCHES = Counter('signaling_topology_switches_total', 'Rooms switching media topology', ['topology'])
+STATS_REPORTS = Counter('signaling_stats_reports_total', 'Client getStats reports folded into call-quality histograms')
+LAYER_HINTS = Counter('signaling_layer_hints_total', 'Video layer changes pushed to senders', ['layer'])
+SETUP_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0)
+SETUP_OFFER_TO_ANSWER = Histogram('signaling_setup_offer_to_answer_seconds', 'Time from a relayed offer to its answer',
+                                  ['topology', 'room_size'], buckets=SETUP_BUCKETS)
+SETUP_OFFER_TO_CANDIDATE = Histogram('signaling_setup_offer_to_first_candidate_seconds', 'Time from a relayed offer to the first candidate of the pair',
+                                     ['topology', 'room_size'], buckets=SETUP_BUCKETS)
+SETUP_OFFER_TO_CONNECTED = Histogram('signaling_setup_offer_to_connected_seconds', 'Time from a relayed offer to the client reporting connected',
+                                     ['topology', 'room_size'], buckets=SETUP_BUCKETS)
+OFFERS_SUPPRESSED = Counter('signaling_offers_suppressed_total', 'Crossing offers dropped in the relay to settle glare')
+JOINS_IN_PROGRESS = Gauge('signaling_joins_in_progress', 'Room joins being processed')
+JOINS_QUEUED = Gauge('signaling_joins_queued', 'Room joins waiting for admission')
+JOIN_QUEUE_WAIT = Histogram('signaling_join_queue_wait_seconds', 'Time joins spent waiting for admission',
+                            buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0))
+JOINS_REJECTED = Counter('signaling_joins_rejected_total', 'Room joins refused by admission control', ['reason'])
+MESSAGES_REJECTED = Counter('signaling_messages_rejected_total', 'Incoming messages that failed decoding or validation', ['reason'])
+RATE_LIMITED = Counter('signaling_rate_limited_total', 'Incoming messages over a rate limit', ['scope', 'type', 'action'])
+FRAMES_TOO_LARGE = Counter('signaling_frames_too_large_total', 'Incoming frames rejected before parsing for their size')
+VIEWER_COUNTS_SENT = Counter('signaling_viewer_counts_sent_total', 'Aggregated webinar viewer_count messages sent')
+SLOW_CONSUMER_EVICTIONS = Counter('signaling_slow_consumer_evictions_total', 'Connections closed for not draining their queue')
+
+# Call quality reported by clients, node-wide. Room ids are never labels: they
+# are all it takes to join a meeting, and this endpoint needs no login
+CALL_RTT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0)  # seconds
+CALL_LOSS_BUCKETS = (0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2)  # fraction of packets
+CALL_JITTER_BUCKETS = (0.005, 0.01, 0.02, 0.03, 0.05, 0.1, 0.2)  # seconds
+CALL_BITRATE_BUCKETS = (50e3, 100e3, 250e3, 500e3, 1e6, 1.5e6, 2.5e6, 5e6)  # bits per second
+CALL_RTT = Histogram('signaling_call_rtt_seconds', 'Round-trip time reported by clients', buckets=CALL_RTT_BUCKETS)
+CALL_LOSS = Histogram('signaling_call_packet_loss_ratio', 'Fraction of packets lost reported by clients',
+                      buckets=CALL_LOSS_BUCKETS)
+CALL_JITTER = Histogram('signaling_call_jitter_seconds', 'Receive jitter reported by clients',
+                        buckets=CALL_JITTER_BUCKETS)
+CALL_BITRATE = Histogram('signaling_call_bitrate_bps', 'Receive bitrate reported by clients',
+                         buckets=CALL_BITRATE_BUCKETS)
+
 @router.get("/metrics")
 async def metrics_endpoint():
     """Prometheus metrics endpoint"""
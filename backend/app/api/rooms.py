@@ -16,11 +16,24 @@ def convert_to_python_types(room_obj):
         "room_id": str(room_obj.room_id),
         "name": str(room_obj.name),
         "description": str(room_obj.description) if room_obj.description else None,
+        "mode": str(room_obj.mode) if room_obj.mode else "meeting",
+        "capacity": int(room_obj.capacity) if room_obj.capacity is not None else None,
         "owner_id": int(str(room_obj.owner_id)),
         "created_at": room_obj.created_at,
-        "participants": [str(user.username) if user.username else "" for user in room_obj.participants] if hasattr(room_obj, 'participants') else []
+        "participants": [str(user.username) if user.username else "" for user in room_obj.participants] if hasattr(room_obj, 'participants') else [],
+        "presenters": get_presenters(room_obj)
     }
 
+def get_presenters(room_obj):
+    """Usernames allowed to publish in a webinar room: the owner plus anyone added as presenter"""
+    if room_obj.mode != "webinar":
+        return []
+    presenters = [str(room_obj.owner.username)] if room_obj.owner is not None and room_obj.owner.username else []
+    for user in room_obj.presenters:
+        if user.username and str(user.username) not in presenters:
+            presenters.append(str(user.username))
+    return presenters
+
 @router.post("/", response_model=RoomWithParticipants)
 async def create_room(
     room: RoomCreate, 
@@ -36,6 +49,8 @@ async def create_room(
         room_id=room_id,
         name=room.name,
         description=room.description,
+        mode=room.mode,
+        capacity=room.capacity,
         owner_id=current_user.id
     )
     db.add(db_room)
@@ -131,4 +146,68 @@ async def leave_room(
         db.commit()
     
     room_data = convert_to_python_types(room)
-    return RoomWithParticipants(**room_data)
\ No newline at end of file
+    return RoomWithParticipants(**room_data)
+
+@router.post("/{room_id}/presenters/{username}", response_model=RoomWithParticipants)
+async def add_presenter(
+    room_id: str,
+    username: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Let a user publish in a webinar room (owner only)"""
+    room = get_owned_webinar(room_id, current_user, db)
+    
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    if user not in room.presenters:
+        room.presenters.append(user)
+        db.commit()
+    
+    room_data = convert_to_python_types(room)
+    return RoomWithParticipants(**room_data)
+
+@router.delete("/{room_id}/presenters/{username}", response_model=RoomWithParticipants)
+async def remove_presenter(
+    room_id: str,
+    username: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Make a presenter a viewer again (owner only)"""
+    room = get_owned_webinar(room_id, current_user, db)
+    
+    user = db.query(User).filter(User.username == username).first()
+    if user and user in room.presenters:
+        room.presenters.remove(user)
+        db.commit()
+    
+    room_data = convert_to_python_types(room)
+    return RoomWithParticipants(**room_data)
+
+def get_owned_webinar(room_id: str, current_user: User, db: Session) -> Room:
+    room = db.query(Room).filter(Room.room_id == room_id).first()
+    if not room:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found"
+        )
+    
+    if room.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the room owner can manage presenters"
+        )
+    
+    if room.mode != "webinar":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Presenters only apply to webinar rooms"
+        )
+    
+    return room
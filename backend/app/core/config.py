@@ -30,6 +30,66 @@ class Settings(BaseSettings):
     REDIS_DB: int = int(os.getenv("REDIS_DB", 0))
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
+    # ICE settings (TURN REST credentials need TURN_URLS and the TURN server's shared secret)
+    STUN_URLS: str = os.getenv("STUN_URLS", "stun:stun.l.google.com:19302,stun:stun1.l.google.com:19302")
+    TURN_URLS: str = os.getenv("TURN_URLS", "")
+    TURN_SECRET: str = os.getenv("TURN_SECRET", "")
+    TURN_CREDENTIAL_TTL: int = int(os.getenv("TURN_CREDENTIAL_TTL", 86400))
+    TURN_REFRESH_FRACTION: float = float(os.getenv("TURN_REFRESH_FRACTION", 0.25))  # reissue when this much lifetime is left
+    TURN_CACHE_SIZE: int = int(os.getenv("TURN_CACHE_SIZE", 10000))
+    
+    # Signaling settings
+    SIGNALING_SEND_TIMEOUT: float = float(os.getenv("SIGNALING_SEND_TIMEOUT", 5.0))
+    SIGNALING_OUTBOUND_QUEUE_SIZE: int = int(os.getenv("SIGNALING_OUTBOUND_QUEUE_SIZE", 256))
+    SIGNALING_JSON_BACKEND: str = os.getenv("SIGNALING_JSON_BACKEND", "auto")  # auto, orjson, ujson or json
+    SIGNALING_LANE_BURST: int = int(os.getenv("SIGNALING_LANE_BURST", 8))  # urgent messages that may overtake in a row
+    SIGNALING_LANE_MAX_DELAY: float = float(os.getenv("SIGNALING_LANE_MAX_DELAY", 0.25))  # then the oldest goes regardless
+    SIGNALING_OVERFLOW_POLICY: str = os.getenv("SIGNALING_OVERFLOW_POLICY", "drop_candidates")  # or "disconnect"
+    SIGNALING_BACKPLANE: str = os.getenv("SIGNALING_BACKPLANE", "auto")  # auto, redis, memory or none
+    SIGNALING_PRESENCE_FLUSH_INTERVAL: float = float(os.getenv("SIGNALING_PRESENCE_FLUSH_INTERVAL", 1.0))
+    SIGNALING_PRESENCE_MAX_BATCH: int = int(os.getenv("SIGNALING_PRESENCE_MAX_BATCH", 500))
+    SIGNALING_PRESENCE_WINDOW_MS: int = int(os.getenv("SIGNALING_PRESENCE_WINDOW_MS", 100))
+    SIGNALING_ROOM_AFFINITY: str = os.getenv("SIGNALING_ROOM_AFFINITY", "proxy")  # proxy, redirect or off; needs a backplane
+    SIGNALING_NODE_URL: str = os.getenv("SIGNALING_NODE_URL", "")  # ws(s)://host:port this node is reached at
+    SIGNALING_NODE_TTL: float = float(os.getenv("SIGNALING_NODE_TTL", 15.0))  # a silent node's room claims and members lapse after this
+    SIGNALING_NODE_REFRESH_INTERVAL: float = float(os.getenv("SIGNALING_NODE_REFRESH_INTERVAL", 5.0))
+    SIGNALING_TOPOLOGY: str = os.getenv("SIGNALING_TOPOLOGY", "mesh")  # mesh, auto or sfu (sfu and auto need aiortc)
+    SIGNALING_SFU_MAX_SUBSCRIPTIONS: int = int(os.getenv("SIGNALING_SFU_MAX_SUBSCRIPTIONS", 100))  # downstream encodes per node
+    SIGNALING_MESH_MAX_PARTICIPANTS: int = int(os.getenv("SIGNALING_MESH_MAX_PARTICIPANTS", 4))
+    SIGNALING_MESH_RETURN_PARTICIPANTS: int = int(os.getenv("SIGNALING_MESH_RETURN_PARTICIPANTS", 2))
+    SIGNALING_VIEWER_COUNT_INTERVAL: float = float(os.getenv("SIGNALING_VIEWER_COUNT_INTERVAL", 2.0))
+    SIGNALING_LAYER_UP_MARGIN: float = float(os.getenv("SIGNALING_LAYER_UP_MARGIN", 1.25))  # headroom needed to step up
+    SIGNALING_LAYER_UP_REPORTS: int = int(os.getenv("SIGNALING_LAYER_UP_REPORTS", 2))  # consecutive reports before stepping up
+    SIGNALING_SETUP_MAX_PENDING: int = int(os.getenv("SIGNALING_SETUP_MAX_PENDING", 10000))
+    SIGNALING_SETUP_KEEP_SLOWEST: int = int(os.getenv("SIGNALING_SETUP_KEEP_SLOWEST", 50))
+    SIGNALING_SETUP_SLOW_WINDOW: float = float(os.getenv("SIGNALING_SETUP_SLOW_WINDOW", 3600.0))
+    SIGNALING_OFFER_TIMEOUT: float = float(os.getenv("SIGNALING_OFFER_TIMEOUT", 10.0))  # offer counts as in flight until answered or this
+    SIGNALING_MAX_CONCURRENT_JOINS: int = int(os.getenv("SIGNALING_MAX_CONCURRENT_JOINS", 32))  # per process
+    SIGNALING_MAX_CONCURRENT_ROOM_JOINS: int = int(os.getenv("SIGNALING_MAX_CONCURRENT_ROOM_JOINS", 8))
+    SIGNALING_JOIN_QUEUE_SIZE: int = int(os.getenv("SIGNALING_JOIN_QUEUE_SIZE", 2000))
+    SIGNALING_JOIN_QUEUE_TIMEOUT: float = float(os.getenv("SIGNALING_JOIN_QUEUE_TIMEOUT", 30.0))
+    SIGNALING_JOIN_QUEUE_UPDATE_INTERVAL: float = float(os.getenv("SIGNALING_JOIN_QUEUE_UPDATE_INTERVAL", 2.0))
+    SIGNALING_ROOM_CAPACITY: int = int(os.getenv("SIGNALING_ROOM_CAPACITY", 0))  # 0 for no limit; rooms can set their own
+    SIGNALING_MAX_FRAME_BYTES: int = int(os.getenv("SIGNALING_MAX_FRAME_BYTES", 65536))  # checked before parsing
+    # Token buckets per message type as type=rate:burst (per second); "*" covers everything else
+    SIGNALING_RATE_LIMITS: str = os.getenv(
+        "SIGNALING_RATE_LIMITS",
+        "offer=5:20,answer=5:20,candidate=50:200,candidates=20:100,stats=1:5,connected=10:50,"
+        "heartbeat=2:10,sfu_publish=2:10,sfu_answer=10:50,*=10:50"
+    )
+    SIGNALING_ROOM_RATE_LIMITS: str = os.getenv("SIGNALING_ROOM_RATE_LIMITS", "*=500:2000")
+    SIGNALING_RATE_LIMIT_ACTION: str = os.getenv("SIGNALING_RATE_LIMIT_ACTION", "drop")  # drop, throttle or close
+    SIGNALING_RATE_LIMIT_MAX_DELAY: float = float(os.getenv("SIGNALING_RATE_LIMIT_MAX_DELAY", 1.0))  # longest throttle wait
+    SIGNALING_RATE_LIMIT_SWEEP_INTERVAL: float = float(os.getenv("SIGNALING_RATE_LIMIT_SWEEP_INTERVAL", 30.0))  # how often refilled buckets are dropped
+    SIGNALING_RESUME_GRACE: float = float(os.getenv("SIGNALING_RESUME_GRACE", 30.0))
+    SIGNALING_REPLAY_BUFFER: int = int(os.getenv("SIGNALING_REPLAY_BUFFER", 128))
+    SIGNALING_PING_INTERVAL: float = float(os.getenv("SIGNALING_PING_INTERVAL", 35.0))  # just above the client heartbeat
+    SIGNALING_IDLE_TIMEOUT: float = float(os.getenv("SIGNALING_IDLE_TIMEOUT", 90.0))
+    SIGNALING_WHEEL_TICK: float = float(os.getenv("SIGNALING_WHEEL_TICK", 1.0))
+    SIGNALING_WHEEL_SLOTS: int = int(os.getenv("SIGNALING_WHEEL_SLOTS", 128))
+    SIGNALING_CANDIDATE_WINDOW_MS: int = int(os.getenv("SIGNALING_CANDIDATE_WINDOW_MS", 20))
+    SIGNALING_CANDIDATE_MAX_BATCH: int = int(os.getenv("SIGNALING_CANDIDATE_MAX_BATCH", 32))
+    
     # Email settings (for OTP)
     SMTP_SERVER: str = os.getenv("SMTP_SERVER", "localhost")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", 1025))
@@ -8,6 +8,7 @@ from app.api.api_new import api_router
 from app.api.routes import router as legacy_router
 from app.api.metrics import router as metrics_router, track_request_metrics
 from app.signaling.server import signaling_app
+from app.signaling.manager import connection_manager
 from app.core.database import engine, Base
 import uvicorn
 
@@ -51,6 +52,11 @@ print("Metrics routes included")
 # Mount the signaling app for WebSocket connections
 app.mount("/ws", signaling_app)
 
+# Mounted apps don't receive lifespan events, so flush signaling state from here
+@app.on_event("shutdown")
+async def shutdown_signaling():
+    await connection_manager.close()
+
 # Serve frontend static files
 # In Docker, frontend is copied to /app/frontend
 # In development, it's in the project root
@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 import os
 from app.api.api_new import api_router
 from app.signaling.server import signaling_app
+from app.signaling.manager import connection_manager
 from app.core.database import engine, Base
 import uvicorn
 
@@ -33,6 +34,11 @@ app.include_router(api_router, prefix="/api")
 # Mount the signaling app for WebSocket connections
 app.mount("/ws", signaling_app)
 
+# Mounted apps don't receive lifespan events, so flush signaling state from here
+@app.on_event("shutdown")
+async def shutdown_signaling():
+    await connection_manager.close()
+
 @app.get("/")
 async def root():
     return {"message": "WebRTC Video/Audio Communication Backend"}
@@ -12,6 +12,14 @@ room_participants = Table(
     Column("user_id", Integer, ForeignKey("users.id"))
 )
 
+# Association table for users allowed to publish in a webinar room (besides the owner)
+room_presenters = Table(
+    "room_presenters",
+    Base.metadata,
+    Column("room_id", Integer, ForeignKey("rooms.id")),
+    Column("user_id", Integer, ForeignKey("users.id"))
+)
+
 class User(Base):
     __tablename__ = "users"
     
@@ -41,11 +49,18 @@ class Room(Base):
     room_id = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
+    # "meeting" (everyone publishes) or "webinar" (presenters publish, everyone else watches)
+    mode = Column(String, nullable=False, default="meeting", server_default="meeting")
+    # Most members connected at once; NULL falls back to SIGNALING_ROOM_CAPACITY
+    capacity = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     owner_id = Column(Integer, ForeignKey("users.id"))
     
     # Relationship to participants
     participants = relationship("User", secondary=room_participants, back_populates="rooms")
     
+    # Relationship to webinar presenters
+    presenters = relationship("User", secondary=room_presenters)
+    
     # Relationship to owner
     owner = relationship("User")
\ No newline at end of file
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class IceServer(BaseModel):
+    urls: List[str]
+    username: Optional[str] = None
+    credential: Optional[str] = None
+
+class IceConfig(BaseModel):
+    iceServers: List[IceServer]
+    ttl: int  # seconds the TURN credentials stay valid
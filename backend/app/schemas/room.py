@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class RoomBase(BaseModel):
@@ -7,6 +7,10 @@ class RoomBase(BaseModel):
     
     name: str
     description: Optional[str] = None
+    # "webinar" rooms have presenters who publish and viewers who only watch
+    mode: Literal["meeting", "webinar"] = "meeting"
+    # Most members connected at once; unset uses the server default
+    capacity: Optional[int] = Field(default=None, ge=1)
 
 class RoomCreate(RoomBase):
     pass
@@ -18,4 +22,5 @@ class Room(RoomBase):
     created_at: datetime
 
 class RoomWithParticipants(Room):
-    participants: List[str] = []
\ No newline at end of file
+    participants: List[str] = []
+    presenters: List[str] = []
\ No newline at end of file
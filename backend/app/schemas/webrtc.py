@@ -1,44 +1,62 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, Dict, Any
-
-class WebRTCSignaling(BaseModel):
-    model_config = ConfigDict(from_attributes=True)
-    
-    type: str  # "offer", "answer", "candidate", "join", "leave"
-    data: Dict[str, Any] = {}
-    sender: str  # sender's user ID
-    recipient: Optional[str] = None  # recipient's user ID (for direct messages)
-    room: Optional[str] = None  # room ID
-
-class Offer(WebRTCSignaling):
-    model_config = ConfigDict(from_attributes=True)
-    
-    type: str = "offer"
-    sdp: str
-    room: str  # type: ignore
+from pydantic import Field
+from typing import Any, Dict, List, Literal
+from typing_extensions import Annotated, NotRequired, TypedDict
+
+# Messages clients send over the signaling socket, validated with pydantic
+# TypeAdapters as they arrive. These are TypedDicts rather than models: a
+# validated message stays a plain dict, which is cheaper to build and can be
+# forwarded to peers as is. Keys a client adds (such as "username") are dropped.
 
-class Answer(WebRTCSignaling):
-    model_config = ConfigDict(from_attributes=True)
-    
-    type: str = "answer"
+class SessionDescription(TypedDict):
+    type: Literal["offer", "answer", "pranswer", "rollback"]
     sdp: str
-    room: str  # type: ignore
-
-class IceCandidate(WebRTCSignaling):
-    model_config = ConfigDict(from_attributes=True)
-    
-    type: str = "candidate"
-    candidate: Dict[str, Any]
-    room: str  # type: ignore
-
-class JoinRoom(WebRTCSignaling):
-    model_config = ConfigDict(from_attributes=True)
-    
-    type: str = "join"
-    room: str  # type: ignore
-
-class LeaveRoom(WebRTCSignaling):
-    model_config = ConfigDict(from_attributes=True)
-    
-    type: str = "leave"
-    room: str  # type: ignore
\ No newline at end of file
+
+class Offer(TypedDict):
+    type: Literal["offer"]
+    target: str  # recipient's username
+    sdp: SessionDescription
+
+class Answer(TypedDict):
+    type: Literal["answer"]
+    target: str
+    sdp: SessionDescription
+
+class IceCandidate(TypedDict):
+    type: Literal["candidate"]
+    target: str
+    candidate: Dict[str, Any]  # RTCIceCandidateInit, passed through to the peer
+
+class IceCandidates(TypedDict):
+    type: Literal["candidates"]
+    target: str
+    candidates: Annotated[List[Dict[str, Any]], Field(min_length=1)]
+
+class SfuPublish(TypedDict):
+    type: Literal["sfu_publish"]
+    sdp: SessionDescription
+
+class SfuAnswer(TypedDict):
+    type: Literal["sfu_answer"]
+    publisher: str
+    sdp: SessionDescription
+
+class Connected(TypedDict):
+    type: Literal["connected"]
+    peer: str
+
+class Stats(TypedDict):
+    type: Literal["stats"]
+    reports: List[Any]  # entries are checked field by field as they are aggregated
+
+class RoomStateRequest(TypedDict):
+    type: Literal["room_state_request"]
+
+class Heartbeat(TypedDict):
+    type: Literal["heartbeat"]
+
+class Pong(TypedDict):
+    type: Literal["pong"]
+
+class LeaveRoom(TypedDict):
+    type: Literal["leave"]
+    room: NotRequired[str]
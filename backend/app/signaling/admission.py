@@ -0,0 +1,182 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+from app.core.config import settings
+from app.api.metrics import JOINS_IN_PROGRESS, JOINS_QUEUED, JOIN_QUEUE_WAIT, JOINS_REJECTED
+
+# Close codes for refused joins (application range, mirroring HTTP 429 and 403)
+BUSY_CLOSE_CODE = 4429
+ROOM_FULL_CLOSE_CODE = 4403
+
+# Sends a join_queued update to a waiting client
+NotifyFn = Callable[[dict], Awaitable[None]]
+
+
+class JoinRejected(Exception):
+    """A join was refused; the client should try again after retry_after seconds (None: don't)"""
+
+    def __init__(self, reason: str, retry_after: Optional[float] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def close_code(self) -> int:
+        return ROOM_FULL_CLOSE_CODE if self.reason == "room_full" else BUSY_CLOSE_CODE
+
+
+class _Waiter:
+    __slots__ = ("room_id", "future")
+
+    def __init__(self, room_id: str):
+        self.room_id = room_id
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class AdmissionController:
+    """
+    Caps how many joins are processed at once, per process and per room.
+    Joins over either cap wait in a queue per room; freed slots go to the
+    rooms round-robin, so one room's join storm does not hold up the rest.
+    Waiting clients get their position and a retry-after estimate every
+    update_interval; joins are refused outright when max_queue are already
+    waiting or after queue_timeout in the queue.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, max_room_concurrent: Optional[int] = None,
+                 max_queue: Optional[int] = None, queue_timeout: Optional[float] = None,
+                 update_interval: Optional[float] = None):
+        self.max_concurrent = max_concurrent or settings.SIGNALING_MAX_CONCURRENT_JOINS
+        self.max_room_concurrent = max_room_concurrent or settings.SIGNALING_MAX_CONCURRENT_ROOM_JOINS
+        self.max_queue = settings.SIGNALING_JOIN_QUEUE_SIZE if max_queue is None else max_queue
+        self.queue_timeout = queue_timeout or settings.SIGNALING_JOIN_QUEUE_TIMEOUT
+        self.update_interval = update_interval or settings.SIGNALING_JOIN_QUEUE_UPDATE_INTERVAL
+        self._active = 0
+        self._room_active: Dict[str, int] = {}
+        # Rooms with waiting joins, in round-robin order
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._queued = 0
+        # Moving average of how long a join holds its slot, for retry-after hints
+        self._join_time = 0.05
+
+    def _has_slot(self, room_id: str) -> bool:
+        return self._active < self.max_concurrent and self._room_active.get(room_id, 0) < self.max_room_concurrent
+
+    def _start(self, room_id: str):
+        self._active += 1
+        self._room_active[room_id] = self._room_active.get(room_id, 0) + 1
+        JOINS_IN_PROGRESS.inc()
+
+    def _finish(self, room_id: str, elapsed: float):
+        self._active -= 1
+        remaining = self._room_active.get(room_id, 1) - 1
+        if remaining:
+            self._room_active[room_id] = remaining
+        else:
+            self._room_active.pop(room_id, None)
+        JOINS_IN_PROGRESS.dec()
+        self._join_time += 0.1 * (elapsed - self._join_time)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to waiting joins, one room at a time in turn"""
+        while self._queues and self._active < self.max_concurrent:
+            for room_id, queue in self._queues.items():
+                if self._room_active.get(room_id, 0) < self.max_room_concurrent:
+                    break
+            else:
+                # Every waiting room is at its own limit
+                return
+            waiter = queue.popleft()
+            self._queued -= 1
+            JOINS_QUEUED.dec()
+            if queue:
+                self._queues.move_to_end(room_id)
+            else:
+                del self._queues[room_id]
+            self._start(room_id)
+            waiter.future.set_result(None)
+
+    def _remove(self, waiter: _Waiter):
+        queue = self._queues.get(waiter.room_id)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            JOINS_QUEUED.dec()
+            if not queue:
+                del self._queues[waiter.room_id]
+
+    def position(self, waiter: _Waiter) -> int:
+        queue = self._queues.get(waiter.room_id)
+        return queue.index(waiter) + 1 if queue is not None and waiter in queue else 0
+
+    def retry_after(self, position: int) -> float:
+        """Rough seconds until a join at this queue position starts"""
+        slots = min(self.max_concurrent, self.max_room_concurrent)
+        rooms = max(1, len(self._queues))
+        # Slots are shared round-robin between the rooms that are waiting
+        return round(max(self._join_time, position * rooms * self._join_time / slots), 1)
+
+    @asynccontextmanager
+    async def slot(self, room_id: str, notify: NotifyFn) -> AsyncIterator[None]:
+        """Hold a join slot for the duration of the block, queueing for one first if needed"""
+        if self._has_slot(room_id) and room_id not in self._queues:
+            self._start(room_id)
+        else:
+            await self._wait(room_id, notify)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._finish(room_id, time.monotonic() - started)
+
+    async def _wait(self, room_id: str, notify: NotifyFn):
+        if self._queued >= self.max_queue:
+            JOINS_REJECTED.labels(reason="queue_full").inc()
+            raise JoinRejected("queue_full", self.retry_after(self._queued))
+
+        waiter = _Waiter(room_id)
+        self._queues.setdefault(room_id, deque()).append(waiter)
+        self._queued += 1
+        JOINS_QUEUED.inc()
+        enqueued = time.monotonic()
+        try:
+            while True:
+                position = self.position(waiter)
+                await notify({
+                    "type": "join_queued",
+                    "position": position,
+                    "retry_after": self.retry_after(position)
+                })
+                remaining = self.queue_timeout - (time.monotonic() - enqueued)
+                if remaining <= 0:
+                    JOINS_REJECTED.labels(reason="queue_timeout").inc()
+                    raise JoinRejected("queue_timeout", self.retry_after(self.position(waiter)))
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), min(self.update_interval, remaining))
+                    break
+                except asyncio.TimeoutError:
+                    continue
+        except BaseException:
+            if waiter.future.done():
+                # Granted a slot just as we gave up; pass it on
+                self._finish(room_id, 0.0)
+            else:
+                self._remove(waiter)
+            raise
+        finally:
+            JOIN_QUEUE_WAIT.observe(time.monotonic() - enqueued)
+
+    def pending(self, room_id: str) -> bool:
+        """True while joins for the room are queued or in progress"""
+        return room_id in self._room_active or room_id in self._queues
+
+    def check_capacity(self, members: int, capacity: Optional[int]):
+        """Refuse a new member when the room already holds capacity members"""
+        capacity = capacity or settings.SIGNALING_ROOM_CAPACITY
+        if capacity and members >= capacity:
+            JOINS_REJECTED.labels(reason="room_full").inc()
+            raise JoinRejected("room_full")
@@ -0,0 +1,275 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+from app.core.config import settings
+from app.signaling import frames
+from app.api.metrics import BACKPLANE_MESSAGES
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+def room_channel(room_id: str) -> str:
+    """Pub/sub channel carrying a room's signaling traffic"""
+    return f"signaling:room:{room_id}"
+
+
+def room_members_key(room_id: str) -> str:
+    """Hash of username -> node id for everyone in a room, across all nodes"""
+    return f"signaling:room:{room_id}:members"
+
+
+def node_alive_key(node_id: str) -> str:
+    """Present for as long as a node keeps beating; member entries of a node without it are stale"""
+    return f"signaling:node:{node_id}:alive"
+
+
+# Delete a member entry only while it still names the given node
+_REMOVE_MEMBER_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2] then
+    return redis.call('HDEL', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+
+class Backplane(ABC):
+    """
+    Routes signaling between processes over per-room channels.
+    Envelopes published by a node are never delivered back to that node.
+
+    Every node refreshes a heartbeat that expires after SIGNALING_NODE_TTL.
+    Member entries left by a node whose heartbeat lapsed (it crashed) are
+    removed whenever a room's members are read, and a leave is delivered
+    for each, as if that node had sent it. Rooms this node is subscribed
+    to are checked on every heartbeat.
+    """
+
+    def __init__(self, node_id: str, ttl: Optional[float] = None, interval: Optional[float] = None):
+        self.node_id = node_id
+        self.handler: Optional[Handler] = None
+        self.ttl = ttl or settings.SIGNALING_NODE_TTL
+        self.interval = interval or settings.SIGNALING_NODE_REFRESH_INTERVAL
+        self.rooms: Set[str] = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler):
+        self.handler = handler
+        await self._beat()
+        self._heartbeat = asyncio.create_task(self._run_heartbeat())
+
+    async def close(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+            # Other nodes drop this node's members at their next heartbeat
+            await self._stop_beating()
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self._beat()
+                for room_id in list(self.rooms):
+                    await self.members(room_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Backplane heartbeat error: {e}")
+
+    async def subscribe(self, room_id: str):
+        self.rooms.add(room_id)
+        await self._subscribe(room_id)
+
+    async def unsubscribe(self, room_id: str):
+        self.rooms.discard(room_id)
+        await self._unsubscribe(room_id)
+
+    async def remove_member(self, room_id: str, username: str):
+        """Remove this node's entry for a member; entries another node wrote are left alone"""
+        await self._remove_member(room_id, username, self.node_id)
+
+    async def members(self, room_id: str) -> Dict[str, str]:
+        """Username -> node id for the room, without (and clearing out) members of dead nodes"""
+        members = await self._members(room_id)
+        nodes = set(members.values()) - {self.node_id}
+        dead = nodes - await self._live_nodes(nodes) if nodes else set()
+        for username, node in list(members.items()):
+            if node in dead:
+                del members[username]
+                await self._remove_member(room_id, username, node)
+                await self._dispatch({"kind": "leave", "origin": node, "room": room_id, "username": username})
+        return members
+
+    @abstractmethod
+    async def _subscribe(self, room_id: str):
+        ...
+
+    @abstractmethod
+    async def _unsubscribe(self, room_id: str):
+        ...
+
+    @abstractmethod
+    async def publish(self, room_id: str, envelope: dict):
+        ...
+
+    @abstractmethod
+    async def add_member(self, room_id: str, username: str):
+        ...
+
+    @abstractmethod
+    async def _remove_member(self, room_id: str, username: str, node_id: str):
+        ...
+
+    @abstractmethod
+    async def _members(self, room_id: str) -> Dict[str, str]:
+        ...
+
+    @abstractmethod
+    async def _beat(self):
+        ...
+
+    @abstractmethod
+    async def _stop_beating(self):
+        ...
+
+    @abstractmethod
+    async def _live_nodes(self, nodes: Set[str]) -> Set[str]:
+        """Those of the given nodes whose heartbeat has not lapsed"""
+
+    async def _dispatch(self, envelope: dict):
+        if envelope.get("origin") == self.node_id or self.handler is None:
+            return
+        BACKPLANE_MESSAGES.labels(direction="received").inc()
+        try:
+            await self.handler(envelope)
+        except Exception as e:
+            print(f"Error handling backplane message: {e}")
+
+
+class InProcessHub:
+    """Shared state standing in for Redis between backplanes in one process"""
+
+    def __init__(self):
+        self.channels: Dict[str, Set["InProcessBackplane"]] = {}
+        self.members: Dict[str, Dict[str, str]] = {}
+        # node id -> heartbeat expiry
+        self.heartbeats: Dict[str, float] = {}
+        # Room directory: room_id -> (owner node id, expires at), node id -> (url, expires at)
+        self.owners: Dict[str, Tuple[str, float]] = {}
+        self.nodes: Dict[str, Tuple[str, float]] = {}
+
+
+default_hub = InProcessHub()
+
+
+class InProcessBackplane(Backplane):
+    """Backplane over an in-process hub, for single-process runs and tests"""
+
+    def __init__(self, node_id: str, hub: Optional[InProcessHub] = None, **kwargs):
+        super().__init__(node_id, **kwargs)
+        self.hub = hub or default_hub
+
+    async def _subscribe(self, room_id: str):
+        self.hub.channels.setdefault(room_id, set()).add(self)
+
+    async def _unsubscribe(self, room_id: str):
+        subscribers = self.hub.channels.get(room_id)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.hub.channels[room_id]
+
+    async def publish(self, room_id: str, envelope: dict):
+        BACKPLANE_MESSAGES.labels(direction="published").inc()
+        # Round-trip through the wire encoding so nodes never share objects
+        data = frames.dumps(envelope)
+        for backplane in list(self.hub.channels.get(room_id, ())):
+            asyncio.ensure_future(backplane._dispatch(frames.loads(data)))
+
+    async def add_member(self, room_id: str, username: str):
+        self.hub.members.setdefault(room_id, {})[username] = self.node_id
+
+    async def _remove_member(self, room_id: str, username: str, node_id: str):
+        members = self.hub.members.get(room_id)
+        if members is not None and members.get(username) == node_id:
+            del members[username]
+            if not members:
+                del self.hub.members[room_id]
+
+    async def _members(self, room_id: str) -> Dict[str, str]:
+        return dict(self.hub.members.get(room_id, {}))
+
+    async def _beat(self):
+        self.hub.heartbeats[self.node_id] = time.monotonic() + self.ttl
+
+    async def _stop_beating(self):
+        self.hub.heartbeats.pop(self.node_id, None)
+
+    async def _live_nodes(self, nodes: Set[str]) -> Set[str]:
+        now = time.monotonic()
+        return {node for node in nodes if self.hub.heartbeats.get(node, 0.0) > now}
+
+
+class RedisBackplane(Backplane):
+    """Backplane over Redis pub/sub, one channel per room"""
+
+    def __init__(self, node_id: str, url: str, **kwargs):
+        super().__init__(node_id, **kwargs)
+        import redis.asyncio as aioredis
+        self.redis = aioredis.Redis.from_url(url)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._remove_script = self.redis.register_script(_REMOVE_MEMBER_SCRIPT)
+        self._reader: Optional[asyncio.Task] = None
+
+    async def _subscribe(self, room_id: str):
+        await self.pubsub.subscribe(room_channel(room_id))
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+
+    async def _unsubscribe(self, room_id: str):
+        await self.pubsub.unsubscribe(room_channel(room_id))
+
+    async def _read(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+                if message is not None and message.get("type") == "message":
+                    await self._dispatch(frames.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Backplane read error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def publish(self, room_id: str, envelope: dict):
+        BACKPLANE_MESSAGES.labels(direction="published").inc()
+        await self.redis.publish(room_channel(room_id), frames.dumps(envelope))
+
+    async def add_member(self, room_id: str, username: str):
+        await self.redis.hset(room_members_key(room_id), username, self.node_id)
+
+    async def _remove_member(self, room_id: str, username: str, node_id: str):
+        await self._remove_script(keys=[room_members_key(room_id)], args=[username, node_id])
+
+    async def _members(self, room_id: str) -> Dict[str, str]:
+        raw = await self.redis.hgetall(room_members_key(room_id))
+        return {username.decode(): node.decode() for username, node in raw.items()}
+
+    async def _beat(self):
+        await self.redis.set(node_alive_key(self.node_id), 1, px=int(self.ttl * 1000))
+
+    async def _stop_beating(self):
+        await self.redis.delete(node_alive_key(self.node_id))
+
+    async def _live_nodes(self, nodes: Set[str]) -> Set[str]:
+        nodes = list(nodes)
+        alive = await self.redis.mget([node_alive_key(node) for node in nodes])
+        return {node for node, beat in zip(nodes, alive) if beat is not None}
+
+    async def close(self):
+        await super().close()
+        if self._reader is not None:
+            self._reader.cancel()
+        await self.pubsub.close()
+        await self.redis.close()
@@ -0,0 +1,91 @@
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.api.metrics import LAYER_HINTS
+
+# name, receive bandwidth it needs (kbps), encoder cap (kbps), resolution scale-down
+LAYERS = (
+    ("low", 0, 200, 4.0),
+    ("mid", 600, 700, 2.0),
+    ("high", 1800, 2500, 1.0),
+)
+TOP_LAYER = len(LAYERS) - 1
+
+# (room_id, sender, receiver, hint)
+HintFn = Callable[[str, str, str, dict], Awaitable[None]]
+
+
+class _PairState:
+    __slots__ = ("layer", "up_streak")
+
+    def __init__(self):
+        # Everyone starts at full quality until a report says otherwise
+        self.layer = TOP_LAYER
+        self.up_streak = 0
+
+
+def layer_hint(receiver: str, layer: int) -> dict:
+    name, _, max_kbps, scale = LAYERS[layer]
+    return {
+        "type": "layer_hint",
+        "receiver": receiver,
+        "layer": name,
+        "max_kbps": max_kbps,
+        "scale_resolution_down_by": scale
+    }
+
+
+class BandwidthController:
+    """
+    Picks the video layer each receiver should get from each sender, from the
+    receiver's bandwidth estimate, and tells the sender when it changes.
+    Drops happen on the first report below the current layer's need; climbs
+    need up_reports reports in a row with up_margin headroom over the next
+    layer, so a link hovering at a threshold does not flap.
+    """
+
+    def __init__(self, send_hint: HintFn, up_margin: Optional[float] = None, up_reports: Optional[int] = None):
+        self.send_hint = send_hint
+        self.up_margin = settings.SIGNALING_LAYER_UP_MARGIN if up_margin is None else up_margin
+        self.up_reports = settings.SIGNALING_LAYER_UP_REPORTS if up_reports is None else up_reports
+        # room_id -> (sender, receiver) -> state
+        self._rooms: Dict[str, Dict[Tuple[str, str], _PairState]] = {}
+
+    def layer(self, room_id: str, sender: str, receiver: str) -> str:
+        state = self._rooms.get(room_id, {}).get((sender, receiver))
+        return LAYERS[state.layer if state is not None else TOP_LAYER][0]
+
+    async def report(self, room_id: str, sender: str, receiver: str, kbps: float) -> Optional[str]:
+        """Feed one bandwidth estimate; returns the new layer name if it changed"""
+        pairs = self._rooms.setdefault(room_id, {})
+        state = pairs.get((sender, receiver))
+        if state is None:
+            state = pairs[(sender, receiver)] = _PairState()
+
+        target = state.layer
+        if kbps < LAYERS[state.layer][1]:
+            # Step down to the best layer that fits right away
+            target = max(index for index, layer in enumerate(LAYERS) if kbps >= layer[1])
+            state.up_streak = 0
+        elif state.layer < TOP_LAYER and kbps >= LAYERS[state.layer + 1][1] * self.up_margin:
+            state.up_streak += 1
+            if state.up_streak >= self.up_reports:
+                target = state.layer + 1
+                state.up_streak = 0
+        else:
+            state.up_streak = 0
+
+        if target == state.layer:
+            return None
+        state.layer = target
+        LAYER_HINTS.labels(layer=LAYERS[target][0]).inc()
+        await self.send_hint(room_id, sender, receiver, layer_hint(receiver, target))
+        return LAYERS[target][0]
+
+    def discard_user(self, room_id: str, username: str):
+        pairs = self._rooms.get(room_id)
+        if pairs:
+            for key in [key for key in pairs if username in key]:
+                del pairs[key]
+
+    def discard(self, room_id: str):
+        self._rooms.pop(room_id, None)
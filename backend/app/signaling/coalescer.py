@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.api.metrics import CANDIDATES_RECEIVED, CANDIDATE_BATCHES_SENT
+
+# (room_id, sender, target)
+PairKey = Tuple[str, str, str]
+DeliverFn = Callable[[str, str, str, List[Any]], Awaitable[None]]
+
+
+class CandidateCoalescer:
+    """
+    Collects trickled ICE candidates per (sender, target) pair over a short
+    window and hands them on as a single batch
+    """
+
+    def __init__(self, deliver: DeliverFn, window: Optional[float] = None, max_batch: Optional[int] = None):
+        self.deliver = deliver
+        self.window = settings.SIGNALING_CANDIDATE_WINDOW_MS / 1000 if window is None else window
+        self.max_batch = max_batch or settings.SIGNALING_CANDIDATE_MAX_BATCH
+        self._pending: Dict[PairKey, List[Any]] = {}
+        self._timers: Dict[PairKey, asyncio.TimerHandle] = {}
+
+    async def add(self, room_id: str, sender: str, target: str, candidates: List[Any]):
+        """Buffer candidates for a pair, flushing when the window closes or the batch is full"""
+        CANDIDATES_RECEIVED.inc(len(candidates))
+        key = (room_id, sender, target)
+        batch = self._pending.setdefault(key, [])
+        batch.extend(candidates)
+
+        if self.window <= 0 or len(batch) >= self.max_batch:
+            await self.flush(room_id, sender, target)
+        elif key not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[key] = loop.call_later(self.window, self._on_window_closed, key)
+
+    def _on_window_closed(self, key: PairKey):
+        self._timers.pop(key, None)
+        asyncio.ensure_future(self.flush(*key))
+
+    async def flush(self, room_id: str, sender: str, target: str):
+        """Deliver whatever is buffered for a pair right away"""
+        key = (room_id, sender, target)
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(key, None)
+        if batch:
+            CANDIDATE_BATCHES_SENT.inc()
+            await self.deliver(room_id, sender, target, batch)
+
+    def discard(self, room_id: str, username: str):
+        """Drop buffered candidates to or from a user who left"""
+        for key in [k for k in self._pending if k[0] == room_id and username in (k[1], k[2])]:
+            timer = self._timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            del self._pending[key]
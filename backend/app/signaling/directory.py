@@ -0,0 +1,217 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Set
+from app.core.config import settings
+from app.signaling.backplane import InProcessHub, default_hub
+from app.api.metrics import ROOMS_OWNED
+
+# Keep a room's ownership while this returns True (it has local members or pending joins)
+KeepFn = Callable[[str], bool]
+
+
+def room_owner_key(room_id: str) -> str:
+    """Node id that owns a room; expires unless its owner keeps refreshing it"""
+    return f"signaling:room:{room_id}:owner"
+
+
+def node_key(node_id: str) -> str:
+    """URL other nodes reach a node at, for as long as it is alive"""
+    return f"signaling:node:{node_id}"
+
+
+# Delete or extend a key only while it still holds the expected value
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+_REFRESH_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RoomDirectory(ABC):
+    """
+    Maps each active room to the one node that owns it. The first node to
+    claim a room owns it; claims and the node's own address expire after
+    ttl unless refreshed, so rooms of a node that dies are free to be
+    claimed elsewhere within ttl. Rooms this node stops needing (keep
+    returns False) are released at the next refresh.
+    """
+
+    def __init__(self, node_id: str, url: str, keep: KeepFn, ttl: Optional[float] = None,
+                 refresh_interval: Optional[float] = None):
+        self.node_id = node_id
+        self.url = url
+        self.keep = keep
+        self.ttl = ttl or settings.SIGNALING_NODE_TTL
+        self.refresh_interval = refresh_interval or settings.SIGNALING_NODE_REFRESH_INTERVAL
+        self.owned: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            await self._register()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Give up every room and this node's address, so other nodes take over at once"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for room_id in list(self.owned):
+            await self.release(room_id)
+        await self._unregister()
+
+    async def route(self, room_id: str) -> Optional[str]:
+        """None if this node owns the room (claiming it if free), else the owner's URL"""
+        owner = await self._claim(room_id)
+        if owner == self.node_id:
+            if room_id not in self.owned:
+                self.owned.add(room_id)
+                ROOMS_OWNED.inc()
+            return None
+        url = await self._address(owner) if owner is not None else None
+        if url is None:
+            # The owner is gone but its claim has not expired yet; serve the room here meanwhile
+            return None
+        return url
+
+    async def release(self, room_id: str):
+        if room_id in self.owned:
+            self.owned.discard(room_id)
+            ROOMS_OWNED.dec()
+        try:
+            await self._release(room_id)
+        except Exception as e:
+            print(f"Room directory error releasing {room_id}: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self._register()
+                for room_id in list(self.owned):
+                    if not self.keep(room_id):
+                        await self.release(room_id)
+                    elif not await self._refresh(room_id):
+                        # Our claim lapsed and another node took the room; the backplane bridges the two
+                        self.owned.discard(room_id)
+                        ROOMS_OWNED.dec()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Room directory refresh error: {e}")
+
+    @abstractmethod
+    async def _claim(self, room_id: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def _refresh(self, room_id: str) -> bool:
+        """Extend our claim on a room; False if it is no longer ours"""
+
+    @abstractmethod
+    async def _release(self, room_id: str):
+        ...
+
+    @abstractmethod
+    async def _address(self, node_id: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def _register(self):
+        ...
+
+    @abstractmethod
+    async def _unregister(self):
+        ...
+
+
+class InProcessDirectory(RoomDirectory):
+    """Room directory over the in-process hub, for single-process runs and tests"""
+
+    def __init__(self, node_id: str, url: str, keep: KeepFn, hub: Optional[InProcessHub] = None, **kwargs):
+        super().__init__(node_id, url, keep, **kwargs)
+        self.hub = hub or default_hub
+
+    def _live(self, entries: Dict, key: str) -> Optional[str]:
+        entry = entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            entries.pop(key, None)
+            return None
+        return entry[0]
+
+    async def _claim(self, room_id: str) -> Optional[str]:
+        owner = self._live(self.hub.owners, room_id)
+        if owner is None:
+            owner = self.node_id
+            self.hub.owners[room_id] = (owner, time.monotonic() + self.ttl)
+        return owner
+
+    async def _refresh(self, room_id: str) -> bool:
+        if self._live(self.hub.owners, room_id) != self.node_id:
+            return False
+        self.hub.owners[room_id] = (self.node_id, time.monotonic() + self.ttl)
+        return True
+
+    async def _release(self, room_id: str):
+        if self._live(self.hub.owners, room_id) == self.node_id:
+            del self.hub.owners[room_id]
+
+    async def _address(self, node_id: str) -> Optional[str]:
+        return self._live(self.hub.nodes, node_id)
+
+    async def _register(self):
+        self.hub.nodes[self.node_id] = (self.url, time.monotonic() + self.ttl)
+
+    async def _unregister(self):
+        self.hub.nodes.pop(self.node_id, None)
+
+
+class RedisDirectory(RoomDirectory):
+    """Room directory in Redis: one expiring key per room owner and per node"""
+
+    def __init__(self, node_id: str, url: str, keep: KeepFn, redis_url: str, **kwargs):
+        super().__init__(node_id, url, keep, **kwargs)
+        import redis.asyncio as aioredis
+        self.redis = aioredis.Redis.from_url(redis_url)
+        self._release_script = self.redis.register_script(_RELEASE_SCRIPT)
+        self._refresh_script = self.redis.register_script(_REFRESH_SCRIPT)
+
+    @property
+    def _ttl_ms(self) -> int:
+        return int(self.ttl * 1000)
+
+    async def _claim(self, room_id: str) -> Optional[str]:
+        key = room_owner_key(room_id)
+        # The claim may lose to another node, or the winner's key may expire before we read it
+        for _ in range(2):
+            if await self.redis.set(key, self.node_id, nx=True, px=self._ttl_ms):
+                return self.node_id
+            owner = await self.redis.get(key)
+            if owner is not None:
+                return owner.decode()
+        return None
+
+    async def _refresh(self, room_id: str) -> bool:
+        return bool(await self._refresh_script(keys=[room_owner_key(room_id)], args=[self.node_id, self._ttl_ms]))
+
+    async def _release(self, room_id: str):
+        await self._release_script(keys=[room_owner_key(room_id)], args=[self.node_id])
+
+    async def _address(self, node_id: str) -> Optional[str]:
+        url = await self.redis.get(node_key(node_id))
+        return url.decode() if url is not None else None
+
+    async def _register(self):
+        await self.redis.set(node_key(self.node_id), self.url, px=self._ttl_ms)
+
+    async def _unregister(self):
+        await self.redis.delete(node_key(self.node_id))
+        await self.redis.close()
@@ -0,0 +1,68 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union, get_args, get_type_hints
+from pydantic import TypeAdapter, ValidationError
+from app.signaling import frames
+from app.api.metrics import MESSAGES_REJECTED
+
+# handler(context, message) -> True to end the connection
+Handler = Callable[[Any, dict], Awaitable[Optional[bool]]]
+
+
+class MessageContext:
+    """What a handler knows about the socket a message came in on"""
+
+    __slots__ = ("websocket", "connection", "username", "room_id")
+
+    def __init__(self, websocket, connection, username: str, room_id: str):
+        self.websocket = websocket
+        self.connection = connection
+        self.username = username
+        self.room_id = room_id
+
+
+class Dispatcher:
+    """
+    Maps message types to a schema and a handler. Frames are parsed with the
+    selected JSON backend (or unpacked from MessagePack) and validated by
+    their type's TypeAdapter, built once at registration. Frames that fail
+    validation or carry an unknown type never reach a handler.
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, Tuple[type, TypeAdapter, Handler]] = {}
+
+    def on(self, schema: type) -> Callable[[Handler], Handler]:
+        """Register the decorated coroutine as the handler for the schema's message type"""
+        msg_type = get_args(get_type_hints(schema)["type"])[0]
+
+        def register(handler: Handler) -> Handler:
+            self._routes[msg_type] = (schema, TypeAdapter(schema), handler)
+            return handler
+        return register
+
+    @property
+    def types(self):
+        return self._routes.keys()
+
+    def decode(self, data: Union[str, bytes]) -> Optional[dict]:
+        """Decode and validate one frame; None (and a rejection metric) if it is not a known, valid message"""
+        try:
+            return self.validate(frames.unpack(data) if isinstance(data, bytes) else frames.loads(data))
+        except ValidationError:
+            MESSAGES_REJECTED.labels(reason="invalid").inc()
+        except ValueError:
+            MESSAGES_REJECTED.labels(reason="undecodable").inc()
+        return None
+
+    def validate(self, message: Any) -> Optional[dict]:
+        """Validate an already decoded message against its type's schema"""
+        msg_type = message.get("type") if isinstance(message, dict) else None
+        # A non-string type (a list, say, from MessagePack) cannot name a route
+        route = self._routes.get(msg_type) if isinstance(msg_type, str) else None
+        if route is None:
+            MESSAGES_REJECTED.labels(reason="unknown_type").inc()
+            return None
+        return route[1].validate_python(message)
+
+    def dispatch(self, context: MessageContext, message: dict) -> Awaitable[Optional[bool]]:
+        """Run the handler for a validated message; awaits to True when the connection should end"""
+        return self._routes[message["type"]][2](context, message)
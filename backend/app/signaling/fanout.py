@@ -0,0 +1,46 @@
+import time
+from typing import Any, Callable, Dict, List
+from app.api.metrics import BROADCAST_DURATION, BROADCAST_FAILURES
+
+# Hands one recipient its copy without waiting on the socket
+PutFn = Callable[[Any], None]
+
+
+class FanoutResult:
+    """Outcome of a single broadcast"""
+
+    __slots__ = ("sent", "failed", "duration")
+
+    def __init__(self):
+        self.sent = 0
+        self.failed: List[str] = []
+        self.duration = 0.0
+
+    @property
+    def dropped(self) -> List[str]:
+        """Recipients that did not get the message and should be cleaned up"""
+        return self.failed
+
+
+def fan_out(recipients: Dict[str, Any], put: PutFn) -> FanoutResult:
+    """
+    Enqueue a message for every recipient in a plain loop. Each socket has
+    its own outbound queue and writer, which enforce the send deadline, so
+    nothing here waits on a socket and no task per recipient is needed.
+    """
+    result = FanoutResult()
+    start_time = time.perf_counter()
+
+    for username, target in recipients.items():
+        try:
+            put(target)
+            result.sent += 1
+        except Exception:
+            result.failed.append(username)
+
+    result.duration = time.perf_counter() - start_time
+    BROADCAST_DURATION.observe(result.duration)
+    if result.failed:
+        BROADCAST_FAILURES.inc(len(result.failed))
+
+    return result
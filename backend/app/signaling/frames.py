@@ -0,0 +1,196 @@
+import json
+from typing import Any, Callable, Iterable, Optional, Tuple, Union
+from fastapi import WebSocket, WebSocketDisconnect
+from app.core.config import settings
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+# Wire formats, negotiated through the Sec-WebSocket-Protocol header
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+SUBPROTOCOLS = {
+    "linksphere.json": ENCODING_JSON,
+    "linksphere.msgpack": ENCODING_MSGPACK,
+}
+
+Dumps = Callable[[Any], str]
+Loads = Callable[[Union[str, bytes]], Any]
+
+
+def _stdlib_backend() -> Tuple[Dumps, Loads]:
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+    return dumps, json.loads
+
+
+def _orjson_backend() -> Tuple[Dumps, Loads]:
+    import orjson
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+    return dumps, orjson.loads
+
+
+def _ujson_backend() -> Tuple[Dumps, Loads]:
+    import ujson
+
+    def dumps(obj: Any) -> str:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+    return dumps, ujson.loads
+
+
+_BACKENDS = {
+    "orjson": _orjson_backend,
+    "ujson": _ujson_backend,
+    "json": _stdlib_backend,
+}
+
+
+def select_backend(name: str = "auto") -> str:
+    """
+    Install the JSON encoder used for signaling frames.
+    "auto" picks the fastest library that is installed, falling back to stdlib json.
+    """
+    global dumps, loads, JSON_BACKEND
+
+    candidates = ["orjson", "ujson", "json"] if name == "auto" else [name, "json"]
+    for candidate in candidates:
+        factory = _BACKENDS.get(candidate)
+        if factory is None:
+            continue
+        try:
+            dumps, loads = factory()
+        except ImportError:
+            continue
+        JSON_BACKEND = candidate
+        return candidate
+
+    raise ValueError(f"Unknown JSON backend: {name}")
+
+
+dumps: Dumps
+loads: Loads
+JSON_BACKEND = "json"
+select_backend(settings.SIGNALING_JSON_BACKEND)
+
+
+def negotiate_subprotocol(offered: Iterable[str]) -> Tuple[Optional[str], str]:
+    """
+    Pick the first subprotocol offered by the client that we can speak.
+    Returns the subprotocol to echo back (None if the client offered none
+    we support) and the wire encoding to use; JSON is the default.
+    """
+    for subprotocol in offered:
+        encoding = SUBPROTOCOLS.get(subprotocol)
+        if encoding == ENCODING_MSGPACK and not MSGPACK_AVAILABLE:
+            continue
+        if encoding is not None:
+            return subprotocol, encoding
+    return None, ENCODING_JSON
+
+
+class FrameTooLarge(ValueError):
+    """An incoming frame was over the size limit and was not parsed"""
+
+
+def unpack(data: bytes) -> Any:
+    """Decode a binary MessagePack frame"""
+    if not MSGPACK_AVAILABLE:
+        raise ValueError("Binary frames are not supported without msgpack")
+    return msgpack.unpackb(data, raw=False)
+
+
+async def receive_frame(websocket: WebSocket, max_size: Optional[int] = None) -> Union[str, bytes]:
+    """
+    Receive one text or binary frame without decoding it.
+    Frames longer than max_size raise FrameTooLarge.
+    """
+    return frame_data(await websocket.receive(), max_size)
+
+
+def frame_data(event: dict, max_size: Optional[int] = None) -> Union[str, bytes]:
+    """
+    The payload of one websocket.receive() event, for loops that await the
+    socket directly rather than through another coroutine per message
+    """
+    if event["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(event.get("code", 1000), event.get("reason"))
+
+    data = event.get("bytes")
+    if data is None:
+        data = event.get("text") or ""
+        # A character is up to 4 bytes in UTF-8; only long text needs encoding to measure
+        if max_size is not None and len(data) * 4 > max_size:
+            size = len(data.encode("utf-8", "surrogatepass"))
+            if size > max_size:
+                raise FrameTooLarge(f"Frame of {size} bytes is over the {max_size} byte limit")
+    elif max_size is not None and len(data) > max_size:
+        raise FrameTooLarge(f"Frame of {len(data)} bytes is over the {max_size} byte limit")
+    return data
+
+
+class Frame:
+    """
+    A signaling message that is serialized at most once per wire format,
+    however many sockets it is sent to
+    """
+
+    __slots__ = ("message", "_text", "_packed")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._text: Optional[str] = None
+        self._packed: Optional[bytes] = None
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.message.get("type")
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = dumps(self.message)
+        return self._text
+
+    @property
+    def packed(self) -> bytes:
+        if self._packed is None:
+            self._packed = msgpack.packb(self.message, use_bin_type=True)
+        return self._packed
+
+    def payload(self, encoding: str = ENCODING_JSON, seq: Optional[int] = None) -> Union[str, bytes]:
+        """
+        Encoded frame for a connection's wire format. A per-connection
+        sequence number is spliced into the cached encoding rather than
+        re-serializing the message.
+        """
+        if encoding == ENCODING_MSGPACK:
+            return self.packed if seq is None else self._packed_with_seq(seq)
+        if seq is None:
+            return self.text
+        return f'{{"seq":{seq},{self.text[1:]}'
+
+    def _packed_with_seq(self, seq: int) -> bytes:
+        packed = self.packed
+        extra = msgpack.packb("seq") + msgpack.packb(seq)
+        head = packed[0]
+        # fixmap: the entry count lives in the low nibble of the first byte
+        if 0x80 <= head < 0x8f:
+            return bytes((head + 1,)) + extra + packed[1:]
+        if head == 0x8f:
+            return b"\xde\x00\x10" + extra + packed[1:]
+        if head == 0xde:
+            count = int.from_bytes(packed[1:3], "big")
+            if count < 0xffff:
+                return b"\xde" + (count + 1).to_bytes(2, "big") + extra + packed[3:]
+        return msgpack.packb({**self.message, "seq": seq}, use_bin_type=True)
+
+
+def as_frame(message: Union[dict, Frame]) -> Frame:
+    """Wrap a plain message dict in a Frame"""
+    return message if isinstance(message, Frame) else Frame(message)
@@ -0,0 +1,126 @@
+import asyncio
+import math
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Set
+from app.core.config import settings
+from app.api.metrics import LIVENESS_PINGS, LIVENESS_EVICTIONS, LIVENESS_TRACKED
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel: scheduling and cancelling are O(1), and each tick
+    only visits the entries hashed into the current slot
+    """
+
+    def __init__(self, tick: float, slots: int):
+        self.tick = tick
+        self.slots: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self.cursor = 0
+        # key -> slot index, for O(1) cancellation
+        self._slot_of: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def schedule(self, key: Hashable, delay: float):
+        """Fire key after roughly delay seconds, replacing any earlier schedule"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self.cursor + ticks) % len(self.slots)
+        # Full turns of the wheel to wait before the slot visit that fires
+        self.slots[slot][key] = (ticks - 1) // len(self.slots)
+        self._slot_of[key] = slot
+
+    def cancel(self, key: Hashable):
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            del self.slots[slot][key]
+
+    def advance(self) -> List[Hashable]:
+        """Move one tick forward and return the keys that expired"""
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        bucket = self.slots[self.cursor]
+        expired = []
+        for key, rounds in list(bucket.items()):
+            if rounds == 0:
+                expired.append(key)
+                del bucket[key]
+                del self._slot_of[key]
+            else:
+                bucket[key] = rounds - 1
+        return expired
+
+
+class LivenessMonitor:
+    """
+    Server-driven idle detection. Inbound traffic only stamps a timestamp;
+    the wheel re-checks each connection when it could next be idle, pings
+    it once it has been quiet for ping_interval and evicts it after
+    idle_timeout.
+    """
+
+    def __init__(self, on_ping: Callable[[Hashable], None], on_idle: Callable[[Hashable], None],
+                 ping_interval: Optional[float] = None, idle_timeout: Optional[float] = None,
+                 tick: Optional[float] = None, slots: Optional[int] = None):
+        self.on_ping = on_ping
+        self.on_idle = on_idle
+        self.ping_interval = ping_interval or settings.SIGNALING_PING_INTERVAL
+        self.idle_timeout = idle_timeout or settings.SIGNALING_IDLE_TIMEOUT
+        self.wheel = TimingWheel(tick or settings.SIGNALING_WHEEL_TICK, slots or settings.SIGNALING_WHEEL_SLOTS)
+        self._last_seen: Dict[Hashable, float] = {}
+        self._pinged: Set[Hashable] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, key: Hashable):
+        self._last_seen[key] = time.monotonic()
+        self._pinged.discard(key)
+        self.wheel.schedule(key, self.ping_interval)
+        LIVENESS_TRACKED.set(len(self._last_seen))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def touch(self, key: Hashable):
+        """Record inbound activity; deliberately does not touch the wheel"""
+        if key in self._last_seen:
+            self._last_seen[key] = time.monotonic()
+            self._pinged.discard(key)
+
+    def untrack(self, key: Hashable):
+        self._last_seen.pop(key, None)
+        self._pinged.discard(key)
+        self.wheel.cancel(key)
+        LIVENESS_TRACKED.set(len(self._last_seen))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.wheel.tick
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            # Catch up on ticks missed while the loop was busy
+            while next_tick <= loop.time():
+                next_tick += self.wheel.tick
+                for key in self.wheel.advance():
+                    try:
+                        self._check(key)
+                    except Exception as e:
+                        print(f"Error checking connection liveness: {e}")
+
+    def _check(self, key: Hashable):
+        last_seen = self._last_seen.get(key)
+        if last_seen is None:
+            return
+
+        idle = time.monotonic() - last_seen
+        if idle >= self.idle_timeout:
+            self.untrack(key)
+            LIVENESS_EVICTIONS.inc()
+            self.on_idle(key)
+            return
+
+        if idle >= self.ping_interval and key not in self._pinged:
+            self._pinged.add(key)
+            LIVENESS_PINGS.inc()
+            self.on_ping(key)
+
+        deadline = self.idle_timeout if key in self._pinged else self.ping_interval
+        self.wheel.schedule(key, deadline - idle)
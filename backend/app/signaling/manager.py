@@ -1,20 +1,75 @@
 import asyncio
-import json
+import uuid
 import redis
-from typing import Dict, Set, List, Optional
+from typing import Any, Dict, List, Optional, Union
 from fastapi import WebSocket
-from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
-from app.models.database_models import Room, User
-from app.utils.database import get_db
 from app.core.config import settings
+from app.signaling.fanout import fan_out, FanoutResult
+from app.signaling.outbound import OutboundQueue
+from app.signaling.frames import Frame, as_frame, ENCODING_JSON
+from app.signaling.coalescer import CandidateCoalescer
+from app.signaling.backplane import Backplane, InProcessBackplane, RedisBackplane
+from app.signaling.directory import RoomDirectory, InProcessDirectory, RedisDirectory
+from app.signaling.presence_journal import PresenceJournal
+from app.signaling.liveness import LivenessMonitor
+from app.signaling.registry import Connection, ConnectionRegistry
+from app.signaling.presence import PresenceCoalescer, ViewerCounter
+from app.signaling.room_policy import RoomPolicyCache, PUBLISHER, VIEWER
+from app.signaling.quality import QualityAggregator
+from app.signaling.bandwidth import BandwidthController
+from app.signaling.setup_timing import SetupTracker
+from app.signaling.negotiation import NegotiationTracker, negotiation_role
+from app.signaling.ratelimit import RateLimiter
+from app.signaling.admission import AdmissionController, JoinRejected
+from app.signaling.sessions import Session, SessionStore, UNBUFFERED_TYPES
+from app.signaling.sfu import SelectiveForwarder, AIORTC_AVAILABLE
+from app.signaling.topology import TopologyController, MESH
+from app.api.ice import ice_config_provider
+from app.api.metrics import SESSION_RESUMES, REPLAYED_MESSAGES
+
+# Close code for connections that stop talking (application range, mirrors HTTP 408)
+IDLE_CLOSE_CODE = 4408
+PING = Frame({"type": "ping"})
+# Close code telling clients this node is going away and they should reconnect elsewhere
+RESTART_CLOSE_CODE = 1012
+# Close code for a socket replaced by a newer one for the same user (mirrors HTTP 409)
+REPLACED_CLOSE_CODE = 4409
+# Closes that mean the user is really gone; anything else may be a network drop worth waiting out
+FINAL_CLOSE_CODES = {1000, IDLE_CLOSE_CODE}
 
 class ConnectionManager:
     def __init__(self):
-        # Store active connections per room
-        self.rooms: Dict[str, Dict[str, WebSocket]] = {}
-        # Store user IDs per room
-        self.room_users: Dict[str, Set[str]] = {}
+        # Active connections, indexed by room, user and socket
+        self.registry = ConnectionRegistry()
+        # Batches trickled ICE candidates per (sender, target) pair
+        self.candidates = CandidateCoalescer(self.send_candidates)
+        # Applies room_participants changes in the background, off the hot path
+        self.presence_journal = PresenceJournal()
+        # Roster versions and debounced roster_delta broadcasts per room
+        self.presence = PresenceCoalescer(self._send_roster_delta)
+        # Meeting or webinar, and who may publish, per active room
+        self.policies = RoomPolicyCache()
+        # Webinar viewers are counted, not announced
+        self.viewers = ViewerCounter(self._send_viewer_count)
+        # Call-quality histograms built from client stats reports
+        self.quality = QualityAggregator()
+        # Per-pair video layer selection from receiver bandwidth estimates
+        self.bandwidth = BandwidthController(self._send_layer_hint)
+        # Offer-to-connected timings per peer pair
+        self.setups = SetupTracker(self._setup_context)
+        # Offers in flight per pair, to settle glare in the relay
+        self.negotiations = NegotiationTracker()
+        # Join concurrency limits and the queue for joins over them
+        self.admission = AdmissionController()
+        # Token buckets on incoming messages, per user and per room
+        self.rate_limits = RateLimiter(in_use=self._rate_limits_in_use)
+        # Server-side idle detection for every socket
+        self.liveness = LivenessMonitor(self._ping, self._evict_idle)
+        # Resume tokens and replay buffers for dropped connections
+        self.sessions = SessionStore(self._expire_session)
+        # Server-side media forwarding, and which rooms use it
+        self.sfu = self._create_sfu()
+        self.topologies = self._create_topology()
         # Redis connection for distributed state (optional)
         try:
             self.redis_client = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=1)
@@ -23,117 +78,613 @@ class ConnectionManager:
         except Exception as e:
             self.redis_client = None
             print(f"Redis not available, using in-memory storage: {e}")
+        
+        # Cross-process routing (optional)
+        self.node_id = uuid.uuid4().hex
+        self.backplane = self._create_backplane()
+        self._backplane_started = False
+        # Which node owns each room, so a room's members share one node
+        self.directory = self._create_directory()
+        self._directory_started = False
+        # Members of each locally active room that are connected to other nodes
+        self.remote_users: Dict[str, Dict[str, str]] = {}
+
+    def _create_backplane(self) -> Optional[Backplane]:
+        """Pick the backplane from settings; "auto" uses Redis when it is reachable"""
+        kind = settings.SIGNALING_BACKPLANE
+        if kind == "auto":
+            kind = "redis" if self.redis_client is not None else "none"
+        if kind == "redis":
+            return RedisBackplane(self.node_id, settings.REDIS_URL)
+        if kind == "memory":
+            return InProcessBackplane(self.node_id)
+        return None
+
+    def _create_directory(self) -> Optional[RoomDirectory]:
+        """Room affinity needs a backplane to fall back on and an address other nodes can reach"""
+        if settings.SIGNALING_ROOM_AFFINITY == "off" or not settings.SIGNALING_NODE_URL:
+            return None
+        keep = lambda room_id: room_id in self.registry or self.admission.pending(room_id)
+        if isinstance(self.backplane, RedisBackplane):
+            return RedisDirectory(self.node_id, settings.SIGNALING_NODE_URL, keep, settings.REDIS_URL)
+        if isinstance(self.backplane, InProcessBackplane):
+            return InProcessDirectory(self.node_id, settings.SIGNALING_NODE_URL, keep, self.backplane.hub)
+        return None
+
+    def _create_sfu(self) -> Optional[SelectiveForwarder]:
+        if settings.SIGNALING_TOPOLOGY not in ("sfu", "auto"):
+            return None
+        if not AIORTC_AVAILABLE:
+            print(f"SIGNALING_TOPOLOGY={settings.SIGNALING_TOPOLOGY} needs aiortc; rooms stay mesh")
+            return None
+        return SelectiveForwarder(self._send_local)
+
+    def _create_topology(self) -> TopologyController:
+        """"auto" switches by room size; "sfu" forwards every room from its first participant"""
+        if settings.SIGNALING_TOPOLOGY == "sfu":
+            return TopologyController(mesh_max=0, mesh_return=-1, sfu_available=self.sfu is not None)
+        return TopologyController(sfu_available=self.sfu is not None)
+
+    def topology(self, room_id: str) -> str:
+        """How media flows in a room: "mesh" (peer to peer) or "sfu" (through the server)"""
+        return self.topologies.mode(room_id)
+
+    async def _update_topology(self, room_id: str, exclude: Optional[str] = None):
+        """Re-check a room's topology after its size changed and tell its clients if it switched"""
+        if room_id not in self.registry:
+            return
+        users = self.get_room_users(room_id)
+        policy = self.policies.get(room_id)
+        # The SFU lives on this node, so it can only serve rooms with no members elsewhere;
+        # webinars use it whenever it can. A mesh room only moves over if every publisher's
+        # stream to every other member fits under the SFU's subscription cap
+        publishers = sum(1 for user in users if policy.role(user) == PUBLISHER)
+        sfu_full = self.sfu is not None and not self.sfu.has_room_for(publishers * (len(users) - 1))
+        changed = self.topologies.update(
+            room_id, len(users), forwardable=not self.remote_users.get(room_id), prefer_sfu=policy.is_webinar,
+            sfu_full=sfu_full
+        )
+        if changed is None:
+            return
+        
+        print(f"Room {room_id} switched to {changed} with {len(users)} participants")
+        if changed == MESH and self.sfu is not None:
+            await self.sfu.close_room(room_id)
+        await self._broadcast_local(room_id, Frame({
+            "type": "topology_changed",
+            "room_id": room_id,
+            "topology": changed,
+            "users": self.get_roster(room_id)
+        }), exclude)
+        
+        if changed != MESH:
+            # Viewers never publish, so the server has to start sending to them
+            for viewer in self.registry.users_in(room_id):
+                if viewer != exclude and policy.role(viewer) == VIEWER:
+                    await self.sfu.watch(room_id, viewer)
+
+    async def route(self, room_id: str) -> Optional[str]:
+        """URL of the node that owns the room, or None to serve it here"""
+        if self.directory is None:
+            return None
+        try:
+            if not self._directory_started:
+                self._directory_started = True
+                await self.directory.start()
+            return await self.directory.route(room_id)
+        except Exception as e:
+            print(f"Room directory unavailable, serving {room_id} locally: {e}")
+            return None
+
+    async def close(self):
+        """Hand owned rooms over, then flush pending presence changes and release the backplane and SFU on shutdown"""
+        if self.directory is not None and self._directory_started:
+            await self.directory.close()
+        # Sessions do not outlive the process: every member, connected or suspended, leaves
+        # before the journal's last flush. Clients reconnect to whichever node takes the room
+        for room_id in list(self.registry.room_ids()):
+            for username, connection in list(self.registry.members(room_id).items()):
+                self.presence_journal.record_leave(room_id, username)
+                if connection.session is not None:
+                    self.sessions.close(connection.session)
+                connection.queue.shutdown(RESTART_CLOSE_CODE)
+        await self.presence_journal.close()
+        if self.sfu is not None:
+            await self.sfu.close()
+        if self.backplane is not None and self._backplane_started:
+            await self.backplane.close()
 
-    def get_db(self):
-        """Get database session"""
-        db = SessionLocal()
+    async def _ensure_backplane(self):
+        if self.backplane is not None and not self._backplane_started:
+            self._backplane_started = True
+            await self.backplane.start(self._on_backplane_message)
+
+    async def _join_remote(self, room_id: str, username: str, first_local: bool):
+        """Announce a local member to other nodes, subscribing to the room if needed"""
         try:
-            yield db
-        finally:
-            db.close()
+            if first_local:
+                await self.backplane.subscribe(room_id)
+                members = await self.backplane.members(room_id)
+                self.remote_users[room_id] = {
+                    member: node for member, node in members.items() if node != self.node_id
+                }
+            await self.backplane.add_member(room_id, username)
+            await self.backplane.publish(room_id, {
+                "kind": "join", "origin": self.node_id, "room": room_id, "username": username
+            })
+        except Exception as e:
+            print(f"Backplane error in connect: {e}")
+
+    async def _leave_remote(self, room_id: str, username: str):
+        """Withdraw a local member from other nodes, unsubscribing once the room is empty here"""
+        try:
+            await self.backplane.remove_member(room_id, username)
+            await self.backplane.publish(room_id, {
+                "kind": "leave", "origin": self.node_id, "room": room_id, "username": username
+            })
+            if room_id not in self.registry:
+                await self.backplane.unsubscribe(room_id)
+                self.remote_users.pop(room_id, None)
+        except Exception as e:
+            print(f"Backplane error in disconnect: {e}")
+
+    async def _publish(self, room_id: str, envelope: dict):
+        envelope["origin"] = self.node_id
+        envelope["room"] = room_id
+        try:
+            await self.backplane.publish(room_id, envelope)
+        except Exception as e:
+            print(f"Backplane publish error: {e}")
 
-    async def connect(self, websocket: WebSocket, username: str, room_id: str):
-        """Connect a user to a room"""
-        await websocket.accept()
+    async def _on_backplane_message(self, envelope: dict):
+        """Apply an envelope published by another node"""
+        kind = envelope.get("kind")
+        room_id = envelope.get("room")
         
-        # Initialize room if it doesn't exist
-        if room_id not in self.rooms:
-            self.rooms[room_id] = {}
-            self.room_users[room_id] = set()
+        if kind == "join":
+            if room_id in self.registry:
+                self.remote_users.setdefault(room_id, {})[envelope["username"]] = envelope["origin"]
+                self._record_presence(room_id, envelope["username"], True)
+                await self._update_topology(room_id)
+        elif kind == "leave":
+            remote = self.remote_users.get(room_id)
+            if remote is not None and remote.get(envelope["username"]) == envelope["origin"]:
+                del remote[envelope["username"]]
+                self._record_presence(room_id, envelope["username"], False)
+                await self._update_topology(room_id)
+        elif kind == "broadcast":
+            await self._broadcast_local(room_id, Frame(envelope["message"]), envelope.get("exclude"))
+        elif kind == "direct":
+            await self._send_local(room_id, envelope["target"], Frame(envelope["message"]))
+
+    def _ping(self, connection: Connection):
+        """Ask a quiet connection to prove it is alive"""
+        try:
+            connection.queue.put(PING.payload(connection.queue.encoding), "ping")
+        except Exception:
+            pass
+
+    def _evict_idle(self, connection: Connection):
+        """Close a connection that stayed silent past the idle deadline"""
+        print(f"Closing idle signaling connection for {connection.username}")
+        connection.queue.shutdown(IDLE_CLOSE_CODE)
+
+    async def connect(self, websocket: WebSocket, username: str, room_id: str,
+                      subprotocol: Optional[str] = None, encoding: str = ENCODING_JSON) -> Optional[Connection]:
+        """
+        Connect a user to a room. Joins wait their turn for admission, hearing
+        their queue position meanwhile; returns None, after closing the
+        socket, if the join is refused.
+        """
+        await websocket.accept(subprotocol=subprotocol)
         
-        # Add user to room
-        self.rooms[room_id][username] = websocket
-        self.room_users[room_id].add(username)
+        async def notify(message: dict):
+            try:
+                await self._send_direct(websocket, message, encoding)
+            except Exception as e:
+                # The client gave up while queued; free its place
+                raise JoinRejected("disconnected") from e
         
-        # Update room participants in database
         try:
-            db = next(self.get_db())
-            room = db.query(Room).filter(Room.room_id == room_id).first()
-            if room:
-                user = db.query(User).filter(User.username == username).first()
-                if user and user not in room.participants:
-                    room.participants.append(user)
-                    db.commit()
-        except Exception as e:
-            print(f"Database error in connect: {e}")
+            async with self.admission.slot(room_id, notify):
+                return await self._join(websocket, username, room_id, encoding)
+        except JoinRejected as e:
+            if room_id not in self.registry:
+                # The refused join may have loaded the policy of a room nobody is in
+                self.policies.discard(room_id)
+            if e.reason == "disconnected":
+                return None
+            try:
+                await self._send_direct(websocket, {
+                    "type": "join_rejected",
+                    "reason": e.reason,
+                    "retry_after": e.retry_after
+                }, encoding)
+                await websocket.close(code=e.close_code)
+            except Exception as send_error:
+                print(f"Error refusing join: {send_error}")
+            return None
+
+    async def _send_direct(self, websocket: WebSocket, message: dict, encoding: str):
+        """Write to a socket that has no outbound queue yet"""
+        payload = Frame(message).payload(encoding)
+        if isinstance(payload, bytes):
+            await websocket.send_bytes(payload)
+        else:
+            await websocket.send_text(payload)
+
+    async def _join(self, websocket: WebSocket, username: str, room_id: str, encoding: str) -> Connection:
+        """Register an admitted connection and announce it"""
+        policy = await self.policies.load(room_id)
+        
+        # Rejoining users already hold their place; anyone else needs room under the cap
+        members = self.get_room_users(room_id)
+        if username not in members:
+            self.admission.check_capacity(len(members), policy.capacity)
+        
+        # Retire any stale socket for the same user; peers see it leave and rejoin
+        previous = self.registry.get(room_id, username)
+        if previous is not None:
+            self._retire(previous)
+            self._record_presence(room_id, username, False)
+        
+        # Give the connection its own outbound queue and writer
+        queue = OutboundQueue(websocket, encoding=encoding)
+        queue.start()
+        first_local = room_id not in self.registry
+        connection = self.registry.add(websocket, username, room_id, queue)
+        self.liveness.track(connection)
+        connection.session = self.sessions.open(connection)
+        
+        # Queue the room participants update for the presence journal
+        self.presence_journal.record_join(room_id, username)
+        
+        # Make the user reachable from other nodes
+        if self.backplane is not None:
+            await self._ensure_backplane()
+            await self._join_remote(room_id, username, first_local)
+        
+        # Give the joiner the full roster now; everyone else hears about it in the next roster_delta
+        self._record_presence(room_id, username, True)
+        # The joiner learns the topology from its room_state snapshot
+        await self._update_topology(room_id, exclude=username)
+        await self.deliver(connection, {
+            "type": "session",
+            "resumed": False,
+            "resume_token": connection.session.token,
+            "grace": self.sessions.grace
+        })
+        await self.send_room_state(connection, include_ice=True)
+        
+        if policy.role(username) == VIEWER and self.topology(room_id) != MESH:
+            await self.sfu.watch(room_id, username)
+        
+        return connection
+
+    async def resume(self, websocket: WebSocket, username: str, room_id: str, token: str, last_seq: int,
+                     subprotocol: Optional[str] = None, encoding: str = ENCODING_JSON) -> Optional[Connection]:
+        """
+        Reattach a dropped session to a new socket and replay what it missed.
+        Returns None, without accepting the socket, if the session cannot be resumed.
+        """
+        session = self.sessions.get(token)
+        connection = session.connection if session is not None else None
+        if (connection is None or connection.username != username or connection.room_id != room_id
+                or self.registry.get(room_id, username) is not connection):
+            SESSION_RESUMES.labels(result="rejected").inc()
+            return None
+        
+        missed = session.replay_after(last_seq)
+        if missed is None:
+            # Part of the gap already fell out of the buffer; start a fresh session instead
+            SESSION_RESUMES.labels(result="gap").inc()
+            self.sessions.close(session)
+            return None
+        
+        await websocket.accept(subprotocol=subprotocol)
         
-        # Notify others in the room that a user joined
-        await self.broadcast_to_room(room_id, {
-            "type": "user_joined",
-            "username": username,
-            "room_id": room_id
-        }, exclude=username)
+        # Swap the socket under the existing connection; the room never sees a leave or join.
+        # An old socket still open (or half-open) is closed, which ends its receive loop
+        connection.queue.shutdown(REPLACED_CLOSE_CODE)
+        self._release(connection)
+        self.sessions.resume(session)
+        queue = OutboundQueue(websocket, encoding=encoding)
+        queue.start()
+        connection.queue = queue
+        self.registry.rebind(connection, websocket)
+        self.liveness.track(connection)
+        
+        await self.deliver(connection, {
+            "type": "session",
+            "resumed": True,
+            "resume_token": session.token,
+            "grace": self.sessions.grace,
+            "replayed": len(missed)
+        })
+        for seq, frame in missed:
+            queue.put(frame.payload(encoding, seq), frame.type)
+        
+        SESSION_RESUMES.labels(result="resumed").inc()
+        REPLAYED_MESSAGES.inc(len(missed))
+        return connection
+
+    async def closed(self, connection: Connection, websocket: WebSocket, code: Optional[int] = None):
+        """
+        Handle a socket closing. Abnormal closes suspend the session for the
+        grace period so a quick reconnect can resume; anything else leaves.
+        """
+        if connection.websocket is not websocket:
+            # The session already moved to a newer socket
+            return
+        
+        if code not in FINAL_CLOSE_CODES and connection.session is not None \
+                and self.registry.get(connection.room_id, connection.username) is connection:
+            self._release(connection)
+            self.sessions.suspend(connection.session)
+            return
+        
+        await self.leave(connection.username, connection.room_id, connection)
+
+    def _expire_session(self, session: Session):
+        """Grace period ran out without a resume: the user really left"""
+        SESSION_RESUMES.labels(result="expired").inc()
+        connection = session.connection
+        asyncio.ensure_future(self.leave(connection.username, connection.room_id, connection))
+
+    async def leave(self, username: str, room_id: str, connection: Optional[Connection] = None) -> bool:
+        """Disconnect a user and tell the rest of the room they left"""
+        if not self.disconnect(username, room_id, connection):
+            return False
+        if room_id in self.registry:
+            self._record_presence(room_id, username, False)
+            await self._update_topology(room_id)
+        return True
+
+    def _record_presence(self, room_id: str, username: str, joined: bool):
+        """Publishers go through the versioned roster; webinar viewers only change the count"""
+        if self.policies.get(room_id).role(username) == PUBLISHER:
+            self.presence.record(room_id, username, joined)
+        else:
+            self.viewers.changed(room_id)
+
+    def get_roster(self, room_id: str) -> List[str]:
+        """Members others negotiate with: everyone in a meeting, only the presenters in a webinar"""
+        users = self.get_room_users(room_id)
+        policy = self.policies.get(room_id)
+        if policy.is_webinar:
+            return [user for user in users if user in policy.presenters]
+        return users
+
+    def count_viewers(self, room_id: str) -> int:
+        policy = self.policies.get(room_id)
+        if not policy.is_webinar:
+            return 0
+        return sum(1 for user in self.get_room_users(room_id) if user not in policy.presenters)
+
+    def may_signal(self, room_id: str, sender: str, target: str) -> bool:
+        """Webinar viewers only negotiate with presenters, never with each other"""
+        policy = self.policies.get(room_id)
+        return policy.role(sender) == PUBLISHER or policy.role(target) == PUBLISHER
 
-    def disconnect(self, username: str, room_id: str):
+    async def _send_viewer_count(self, room_id: str):
+        if room_id in self.registry:
+            await self._broadcast_local(room_id, Frame({
+                "type": "viewer_count",
+                "room_id": room_id,
+                "viewers": self.count_viewers(room_id)
+            }))
+
+    async def send_room_state(self, connection: Connection, include_ice: bool = False):
+        """Send a connection the full, versioned roster of its room"""
+        room_id = connection.room_id
+        policy = self.policies.get(room_id)
+        users = [user for user in self.get_roster(room_id) if user != connection.username]
+        await self.deliver(connection, {
+            "type": "room_state",
+            "room_id": room_id,
+            "version": self.presence.version(room_id),
+            "topology": self.topology(room_id),
+            "mode": policy.mode,
+            "role": policy.role(connection.username),
+            "viewers": self.count_viewers(room_id),
+            "username": connection.username,
+            "users": users,
+            # Who yields when both sides of a pair offer at once
+            "roles": {user: negotiation_role(connection.username, user) for user in users},
+            # On join, the ICE configuration rides along so the client skips an HTTP round trip
+            **({"ice": ice_config_provider.get(connection.username)} if include_ice else {})
+        })
+
+    async def _send_roster_delta(self, room_id: str, delta: dict):
+        # Every node sends roster deltas to its own sockets, so presence never crosses the backplane
+        await self._broadcast_local(room_id, Frame(delta))
+
+    def _drop(self, username: str, room_id: str):
+        """Remove a user whose socket stopped accepting messages, announcing the leave"""
+        asyncio.ensure_future(self.leave(username, room_id))
+
+    def _release(self, connection: Connection):
+        """Stop the writer and idle tracking for a connection"""
+        connection.queue.close()
+        self.liveness.untrack(connection)
+
+    def _rate_limits_in_use(self, room_id: str, username: Optional[str]) -> bool:
+        if username is None:
+            return room_id in self.registry
+        return self.registry.get(room_id, username) is not None
+
+    def _retire(self, connection: Connection):
+        """Close a connection a newer one for the same user replaced, and drop its session"""
+        connection.queue.shutdown(REPLACED_CLOSE_CODE)
+        self._release(connection)
+        if connection.session is not None:
+            self.sessions.close(connection.session)
+
+    def disconnect(self, username: str, room_id: str, connection: Optional[Connection] = None):
         """Disconnect a user from a room"""
-        if room_id in self.rooms and username in self.rooms[room_id]:
-            del self.rooms[room_id][username]
-            self.room_users[room_id].discard(username)
+        if connection is not None and self.registry.get(room_id, username) is not connection:
+            # A newer socket for the same user has replaced this one; leave the newer one alone
+            self._retire(connection)
+            return False
+        
+        connection = self.registry.remove(room_id, username)
+        if connection is not None:
+            self._release(connection)
+            if connection.session is not None:
+                self.sessions.close(connection.session)
+            self.candidates.discard(room_id, username)
+            self.bandwidth.discard_user(room_id, username)
+            self.setups.discard_user(room_id, username)
+            self.negotiations.discard_user(room_id, username)
+            # Buckets stay until they refill, so rejoining does not reset them
+            self.rate_limits.sweep()
             
-            # Update room participants in database
-            try:
-                db = next(self.get_db())
-                room = db.query(Room).filter(Room.room_id == room_id).first()
-                if room:
-                    user = db.query(User).filter(User.username == username).first()
-                    if user and user in room.participants:
-                        room.participants.remove(user)
-                        db.commit()
-            except Exception as e:
-                print(f"Database error in disconnect: {e}")
+            # Queue the room participants update for the presence journal
+            self.presence_journal.record_leave(room_id, username)
+            
+            if room_id not in self.registry:
+                self.presence.discard(room_id)
+                self.topologies.discard(room_id)
+                self.viewers.discard(room_id)
+                self.policies.discard(room_id)
+                self.quality.discard(room_id)
+                self.bandwidth.discard(room_id)
             
-            # Clean up empty rooms
-            if not self.rooms[room_id]:
-                del self.rooms[room_id]
-                del self.room_users[room_id]
+            if self.backplane is not None:
+                asyncio.ensure_future(self._leave_remote(room_id, username))
+            
+            if self.sfu is not None:
+                asyncio.ensure_future(self.sfu.remove(room_id, username))
             
             return True
         return False
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
+    async def deliver(self, target: Union[Connection, WebSocket], message: Union[dict, Frame]):
+        """Hand a message to the connection's outbound queue, raising if it is gone"""
+        frame = as_frame(message)
+        connection = target if isinstance(target, Connection) else self.registry.by_socket(target)
+        if connection is not None:
+            self._enqueue(connection, frame)
+        else:
+            await target.send_text(frame.text)
+
+    def _enqueue(self, connection: Connection, frame: Frame):
+        """Queue a frame for a connection's writer; never waits on the socket"""
+        # Number and keep the message so a resumed session can replay it
+        seq = None
+        session = connection.session
+        if session is not None and frame.type not in UNBUFFERED_TYPES:
+            seq = session.record(frame)
+            if session.suspended:
+                return
+        
+        # Each connection gets the frame in its own wire format
+        connection.queue.put(frame.payload(connection.queue.encoding, seq), frame.type)
+        connection.messages_out += 1
+
+    async def send_personal_message(self, message: Union[dict, Frame], websocket: WebSocket):
         """Send a message to a specific websocket"""
         try:
-            await websocket.send_text(json.dumps(message))
+            await self.deliver(websocket, message)
         except Exception as e:
             print(f"Error sending message: {e}")
 
-    async def broadcast_to_room(self, room_id: str, message: dict, exclude: Optional[str] = None):
-        """Broadcast a message to all users in a room"""
-        if room_id in self.rooms:
-            disconnected_users = []
-            for username, websocket in self.rooms[room_id].items():
-                if exclude is None or username != exclude:
-                    try:
-                        await self.send_personal_message(message, websocket)
-                    except Exception:
-                        # Mark user as disconnected if sending fails
-                        disconnected_users.append(username)
-            
-            # Clean up disconnected users
-            for username in disconnected_users:
-                self.disconnect(username, room_id)
+    async def broadcast_to_room(self, room_id: str, message: Union[dict, Frame], exclude: Optional[str] = None) -> Optional[FanoutResult]:
+        """Broadcast a message to all users in a room, on this node and any other"""
+        frame = as_frame(message)
+        result = await self._broadcast_local(room_id, frame, exclude)
+        
+        # Local fast path: only touch the backplane when peers live elsewhere
+        if self.remote_users.get(room_id):
+            await self._publish(room_id, {"kind": "broadcast", "exclude": exclude, "message": frame.message})
+        
+        return result
 
-    async def send_to_user(self, room_id: str, username: str, message: dict):
-        """Send a message to a specific user in a room"""
-        if room_id in self.rooms and username in self.rooms[room_id]:
+    async def _broadcast_local(self, room_id: str, frame: Frame, exclude: Optional[str] = None) -> Optional[FanoutResult]:
+        """Broadcast a frame to the users of a room connected to this node"""
+        if room_id not in self.registry:
+            return None
+        
+        recipients = {
+            username: connection
+            for username, connection in self.registry.members(room_id).items()
+            if exclude is None or username != exclude
+        }
+        
+        # Serialize once per wire format and reuse it for every recipient
+        result = fan_out(recipients, lambda connection: self._enqueue(connection, frame))
+        
+        # Clean up users whose queue is closed (their writer missed the send deadline or failed)
+        for username in result.dropped:
+            self._drop(username, room_id)
+        
+        return result
+
+    async def send_to_user(self, room_id: str, username: str, message: Union[dict, Frame]):
+        """Send a message to a specific user in a room, wherever they are connected"""
+        if await self._send_local(room_id, username, message):
+            return
+        
+        if username in self.remote_users.get(room_id, {}):
+            await self._publish(room_id, {"kind": "direct", "target": username, "message": as_frame(message).message})
+
+    async def _send_local(self, room_id: str, username: str, message: Union[dict, Frame]) -> bool:
+        """Send to a user connected to this node, returning False if they are not here"""
+        connection = self.registry.get(room_id, username)
+        if connection is not None:
             try:
-                await self.send_personal_message(message, self.rooms[room_id][username])
+                await self.deliver(connection, message)
             except Exception:
                 # Clean up if user is disconnected
-                self.disconnect(username, room_id)
+                self._drop(username, room_id)
+            return True
+        return False
+
+    async def send_candidates(self, room_id: str, sender: str, target: str, candidates: List[Any]):
+        """Forward a batch of ICE candidates, as a single "candidate" message when there is only one"""
+        if len(candidates) == 1:
+            message = {"type": "candidate", "from": sender, "candidate": candidates[0]}
+        else:
+            message = {"type": "candidates", "from": sender, "candidates": candidates}
+        await self.send_to_user(room_id, target, message)
+
+    async def record_stats(self, room_id: str, username: str, reports: Any):
+        """Take a client's stats message: quality histograms, then layer selection per sender"""
+        self.quality.record(room_id, reports)
+        if not isinstance(reports, list):
+            return
+        
+        for report in reports:
+            if not isinstance(report, dict):
+                continue
+            peer = report.get("peer")
+            if peer == username or (self.registry.get(room_id, peer) is None
+                                    and peer not in self.remote_users.get(room_id, {})):
+                continue
+            # bwe is the reporter's estimate of what it can receive from the peer;
+            # send_bwe (transport-cc, all Chrome exposes) what it can send to the peer
+            kbps = report.get("bwe")
+            if isinstance(kbps, (int, float)) and not isinstance(kbps, bool) and kbps >= 0:
+                await self.bandwidth.report(room_id, peer, username, kbps)
+            kbps = report.get("send_bwe")
+            if isinstance(kbps, (int, float)) and not isinstance(kbps, bool) and kbps >= 0:
+                await self.bandwidth.report(room_id, username, peer, kbps)
+
+    def _setup_context(self, room_id: str):
+        return self.topology(room_id), len(self.get_room_users(room_id))
+
+    async def _send_layer_hint(self, room_id: str, sender: str, receiver: str, hint: dict):
+        # The sender owns the encoder for this pair, so that is who adapts
+        await self.send_to_user(room_id, sender, hint)
 
     def get_room_users(self, room_id: str) -> List[str]:
-        """Get list of usernames in a room"""
-        if room_id in self.room_users:
-            return list(self.room_users[room_id])
-        return []
+        """Get list of usernames in a room, including members on other nodes"""
+        local = self.registry.members(room_id)
+        remote = [u for u in self.remote_users.get(room_id, {}) if u not in local]
+        return list(local) + remote
 
     def get_user_rooms(self, username: str) -> List[str]:
         """Get list of rooms a user is in"""
-        rooms = []
-        for room_id, users in self.room_users.items():
-            if username in users:
-                rooms.append(room_id)
-        return rooms
+        return self.registry.rooms_of(username)
 
 connection_manager = ConnectionManager()
\ No newline at end of file
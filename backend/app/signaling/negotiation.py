@@ -0,0 +1,58 @@
+import time
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.api.metrics import OFFERS_SUPPRESSED
+
+POLITE = "polite"
+IMPOLITE = "impolite"
+
+
+def negotiation_role(username: str, peer: str) -> str:
+    """
+    A user's role towards one peer. The same for both sides of every pair
+    without any shared state: the lower username is impolite and wins glare.
+    """
+    return IMPOLITE if username < peer else POLITE
+
+
+class NegotiationTracker:
+    """
+    Watches offers in flight per pair so crossing offers (glare) are settled
+    in the relay. When both sides offer before either answers, the polite
+    side's offer is dropped and the pair negotiates once. An offer counts as
+    in flight until it is answered or offer_timeout passes.
+    """
+
+    def __init__(self, offer_timeout: Optional[float] = None):
+        self.offer_timeout = settings.SIGNALING_OFFER_TIMEOUT if offer_timeout is None else offer_timeout
+        # (room_id, lower username, higher username) -> (offerer, sent at)
+        self._in_flight: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+
+    @staticmethod
+    def _key(room_id: str, a: str, b: str) -> Tuple[str, str, str]:
+        return (room_id, a, b) if a < b else (room_id, b, a)
+
+    def offer(self, room_id: str, sender: str, target: str) -> bool:
+        """Note an offer; returns False if it lost a glare and should not be forwarded"""
+        key = self._key(room_id, sender, target)
+        now = time.monotonic()
+        pending = self._in_flight.get(key)
+
+        if pending is not None and pending[0] == target and now - pending[1] < self.offer_timeout:
+            # Crossing offers: the impolite side goes ahead, the polite side waits for it
+            if negotiation_role(sender, target) == POLITE:
+                OFFERS_SUPPRESSED.inc()
+                return False
+
+        self._in_flight[key] = (sender, now)
+        return True
+
+    def answer(self, room_id: str, sender: str, target: str):
+        key = self._key(room_id, sender, target)
+        pending = self._in_flight.get(key)
+        if pending is not None and pending[0] == target:
+            del self._in_flight[key]
+
+    def discard_user(self, room_id: str, username: str):
+        for key in [key for key in self._in_flight if key[0] == room_id and username in key[1:]]:
+            del self._in_flight[key]
@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple, Union
+from fastapi import WebSocket
+from app.core.config import settings
+from app.signaling.frames import ENCODING_JSON
+from app.api.metrics import OUTBOUND_QUEUE_DEPTH, OUTBOUND_DROPS, SLOW_CONSUMER_EVICTIONS, OUTBOUND_LANE_LATENCY
+
+# Overflow policies for a full outbound queue
+POLICY_DROP_CANDIDATES = "drop_candidates"
+POLICY_DISCONNECT = "disconnect"
+
+# Message types that can be discarded without breaking negotiation
+DROPPABLE_TYPES = {"candidate", "candidates", "heartbeat_response", "ping"}
+
+# Close code sent to evicted slow consumers (1013 = try again later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Delivery lanes, most urgent first. Session descriptions and snapshots
+# gate media setup; trickle, keepalive and counters can wait a little.
+LANE_CONTROL = 0
+LANE_NORMAL = 1
+LANE_BULK = 2
+LANE_NAMES = ("control", "normal", "bulk")
+CONTROL_TYPES = {
+    "offer", "answer", "room_state", "session", "offer_suppressed",
+    "sfu_offer", "topology_changed", "join_rejected"
+}
+BULK_TYPES = {
+    "candidate", "candidates", "ping", "heartbeat_response",
+    "viewer_count", "layer_hint", "join_queued"
+}
+
+# payload, droppable, lane, enqueued at
+Entry = Tuple[Union[str, bytes], bool, int, float]
+
+
+def lane_for(msg_type: Optional[str]) -> int:
+    if msg_type in CONTROL_TYPES:
+        return LANE_CONTROL
+    if msg_type in BULK_TYPES:
+        return LANE_BULK
+    return LANE_NORMAL
+
+
+class QueueClosed(Exception):
+    """Raised when enqueueing to a connection that has been closed or evicted"""
+
+
+class OutboundQueue:
+    """
+    Bounded outbound queue for one WebSocket, drained by its own writer task
+    so that senders never await a peer's socket directly.
+
+    Messages wait in priority lanes and the writer takes from the most urgent
+    one, so an offer can overtake queued candidates. Overtaking is limited:
+    after burst overtakes in a row, or once an older message has waited
+    max_delay, the oldest message goes next. A message is never sent ahead
+    of a more urgent one queued before it.
+    """
+
+    def __init__(self, websocket: WebSocket, maxsize: Optional[int] = None, policy: Optional[str] = None,
+                 encoding: str = ENCODING_JSON, burst: Optional[int] = None, max_delay: Optional[float] = None):
+        self.websocket = websocket
+        self.encoding = encoding
+        self.maxsize = maxsize or settings.SIGNALING_OUTBOUND_QUEUE_SIZE
+        self.policy = policy or settings.SIGNALING_OVERFLOW_POLICY
+        self.burst = burst or settings.SIGNALING_LANE_BURST
+        self.max_delay = settings.SIGNALING_LANE_MAX_DELAY if max_delay is None else max_delay
+        self.closed = False
+        self.dropped = 0
+        self._lanes: List[Deque[Entry]] = [deque() for _ in LANE_NAMES]
+        self._size = 0
+        # Messages sent in a row ahead of an older one
+        self._overtakes = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the writer task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, payload: Union[str, bytes], msg_type: Optional[str] = None):
+        """Enqueue a payload without waiting for the socket"""
+        if self.closed:
+            raise QueueClosed()
+
+        if self._size >= self.maxsize and not self._make_room():
+            self.evict()
+            raise QueueClosed()
+
+        lane = lane_for(msg_type)
+        self._lanes[lane].append((payload, msg_type in DROPPABLE_TYPES, lane, time.monotonic()))
+        self._size += 1
+        OUTBOUND_QUEUE_DEPTH.inc()
+        self._wakeup.set()
+
+    def _make_room(self) -> bool:
+        """Apply the overflow policy, returning True if a slot was freed"""
+        if self.policy != POLICY_DROP_CANDIDATES:
+            return False
+
+        # Shed from the least urgent lane first
+        for queue in reversed(self._lanes):
+            for index, entry in enumerate(queue):
+                if entry[1]:
+                    del queue[index]
+                    self._size -= 1
+                    self.dropped += 1
+                    OUTBOUND_QUEUE_DEPTH.dec()
+                    OUTBOUND_DROPS.labels(reason="overflow").inc()
+                    return True
+        return False
+
+    def _next(self) -> Entry:
+        """Take the next message to send: most urgent first, oldest first when overtaking runs long"""
+        urgent = next(queue for queue in self._lanes if queue)
+        oldest = min((queue for queue in self._lanes if queue), key=lambda queue: queue[0][3])
+        if oldest is not urgent and self._overtakes < self.burst \
+                and time.monotonic() - oldest[0][3] < self.max_delay:
+            self._overtakes += 1
+            queue = urgent
+        else:
+            self._overtakes = 0
+            queue = oldest
+        self._size -= 1
+        return queue.popleft()
+
+    async def _run(self):
+        try:
+            while True:
+                while not self._size:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+
+                payload, _, lane, enqueued = self._next()
+                OUTBOUND_QUEUE_DEPTH.dec()
+                if isinstance(payload, bytes):
+                    send = self.websocket.send_bytes(payload)
+                else:
+                    send = self.websocket.send_text(payload)
+                try:
+                    await asyncio.wait_for(send, settings.SIGNALING_SEND_TIMEOUT)
+                except asyncio.TimeoutError:
+                    print("Outbound send timed out, evicting slow consumer")
+                    self.evict()
+                    return
+                OUTBOUND_LANE_LATENCY.labels(lane=LANE_NAMES[lane]).observe(time.monotonic() - enqueued)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error in outbound writer: {e}")
+            self.close()
+
+    def evict(self):
+        """Close a consumer that cannot keep up"""
+        if self.closed:
+            return
+        SLOW_CONSUMER_EVICTIONS.inc()
+        self.shutdown(SLOW_CONSUMER_CLOSE_CODE)
+
+    def shutdown(self, code: int):
+        """Stop the writer and close the socket with the given code"""
+        if self.closed:
+            return
+        self.close()
+        asyncio.ensure_future(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=code),
+                settings.SIGNALING_SEND_TIMEOUT
+            )
+        except Exception:
+            pass
+
+    def close(self):
+        """Stop the writer and discard anything still queued"""
+        if self.closed:
+            return
+        self.closed = True
+        if self._size:
+            OUTBOUND_DROPS.labels(reason="closed").inc(self._size)
+            OUTBOUND_QUEUE_DEPTH.dec(self._size)
+            for queue in self._lanes:
+                queue.clear()
+            self._size = 0
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
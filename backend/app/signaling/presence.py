@@ -0,0 +1,127 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.api.metrics import PRESENCE_EVENTS, ROSTER_DELTAS_SENT, VIEWER_COUNTS_SENT
+
+DeliverFn = Callable[[str, dict], Awaitable[None]]
+
+
+class _RoomPresence:
+    __slots__ = ("version", "flushed_version", "changes", "timer")
+
+    def __init__(self):
+        self.version = 0
+        self.flushed_version = 0
+        # username -> (first event was a join, last event was a join, saw more than one event)
+        self.changes: Dict[str, Tuple[bool, bool, bool]] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class PresenceCoalescer:
+    """
+    Owns each room's roster version and turns bursts of joins and leaves
+    into one roster_delta per room per window
+    """
+
+    def __init__(self, deliver: DeliverFn, window: Optional[float] = None):
+        self.deliver = deliver
+        self.window = settings.SIGNALING_PRESENCE_WINDOW_MS / 1000 if window is None else window
+        self._rooms: Dict[str, _RoomPresence] = {}
+
+    def version(self, room_id: str) -> int:
+        room = self._rooms.get(room_id)
+        return room.version if room is not None else 0
+
+    def record(self, room_id: str, username: str, joined: bool) -> int:
+        """Note a membership change and return the room's new roster version"""
+        PRESENCE_EVENTS.inc()
+        room = self._rooms.get(room_id)
+        if room is None:
+            room = self._rooms[room_id] = _RoomPresence()
+        room.version += 1
+
+        previous = room.changes.get(username)
+        if previous is None:
+            room.changes[username] = (joined, joined, False)
+        else:
+            room.changes[username] = (previous[0], joined, True)
+
+        if room.timer is None:
+            loop = asyncio.get_running_loop()
+            room.timer = loop.call_later(self.window, self._on_window_closed, room_id)
+        return room.version
+
+    def _on_window_closed(self, room_id: str):
+        room = self._rooms.get(room_id)
+        if room is not None:
+            room.timer = None
+            asyncio.ensure_future(self.flush(room_id))
+
+    async def flush(self, room_id: str):
+        """Send the pending delta for a room right away"""
+        room = self._rooms.get(room_id)
+        if room is None or not room.changes:
+            return
+        if room.timer is not None:
+            room.timer.cancel()
+            room.timer = None
+
+        added: List[str] = []
+        removed: List[str] = []
+        for username, (first_joined, last_joined, repeated) in room.changes.items():
+            # A user who left and came back in one window appears in both lists
+            if last_joined and (first_joined or repeated):
+                added.append(username)
+            if not first_joined and (not last_joined or repeated):
+                removed.append(username)
+
+        delta = {
+            "type": "roster_delta",
+            "room_id": room_id,
+            "from_version": room.flushed_version,
+            "version": room.version,
+            "added": added,
+            "removed": removed
+        }
+        room.changes = {}
+
+        # A window that cancels out (join then leave) sends nothing, and the
+        # next delta still starts from the last version clients saw
+        if added or removed:
+            room.flushed_version = room.version
+            ROSTER_DELTAS_SENT.inc()
+            await self.deliver(room_id, delta)
+
+    def discard(self, room_id: str):
+        """Forget a room that has no local members left"""
+        room = self._rooms.pop(room_id, None)
+        if room is not None and room.timer is not None:
+            room.timer.cancel()
+
+
+class ViewerCounter:
+    """
+    Webinar viewers are not announced one by one. Their joins and leaves
+    only mark the room, and the room's count goes out at most once per interval.
+    """
+
+    def __init__(self, deliver: Callable[[str], Awaitable[None]], interval: Optional[float] = None):
+        self.deliver = deliver
+        self.interval = settings.SIGNALING_VIEWER_COUNT_INTERVAL if interval is None else interval
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+    def changed(self, room_id: str):
+        if room_id not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[room_id] = loop.call_later(self.interval, self._on_interval, room_id)
+
+    def _on_interval(self, room_id: str):
+        if self._timers.pop(room_id, None) is not None:
+            VIEWER_COUNTS_SENT.inc()
+            # The count is read when it is sent, so it is never stale
+            asyncio.ensure_future(self.deliver(room_id))
+
+    def discard(self, room_id: str):
+        timer = self._timers.pop(room_id, None)
+        if timer is not None:
+            timer.cancel()
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database_models import Room, User
+from app.api.metrics import PRESENCE_PENDING, PRESENCE_FLUSH_DURATION, PRESENCE_FLUSH_ERRORS
+
+# (room_id, username) -> True for joined, False for left
+PresenceBatch = Dict[Tuple[str, str], bool]
+
+
+class PresenceJournal:
+    """
+    Write-behind journal keeping room_participants in sync with WebSocket
+    presence. Joins and leaves are recorded in memory and applied in batched
+    transactions by a background worker, off the event loop.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal,
+                 flush_interval: Optional[float] = None, max_batch: Optional[int] = None):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval or settings.SIGNALING_PRESENCE_FLUSH_INTERVAL
+        self.max_batch = max_batch or settings.SIGNALING_PRESENCE_MAX_BATCH
+        # Only the latest event per (room, user) matters, so pending events collapse
+        self._pending: PresenceBatch = {}
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def record_join(self, room_id: str, username: str):
+        self._record(room_id, username, True)
+
+    def record_leave(self, room_id: str, username: str):
+        self._record(room_id, username, False)
+
+    def _record(self, room_id: str, username: str, joined: bool):
+        key = (room_id, username)
+        self._pending.pop(key, None)
+        self._pending[key] = joined
+        PRESENCE_PENDING.set(len(self._pending))
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Apply everything recorded so far in one transaction"""
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            PRESENCE_PENDING.set(0)
+
+            start_time = time.perf_counter()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._apply, batch)
+            except Exception as e:
+                print(f"Database error flushing presence journal: {e}")
+                PRESENCE_FLUSH_ERRORS.inc()
+                # Retry on the next flush; events recorded since then are newer and win
+                for key, joined in batch.items():
+                    self._pending.setdefault(key, joined)
+                PRESENCE_PENDING.set(len(self._pending))
+            finally:
+                PRESENCE_FLUSH_DURATION.observe(time.perf_counter() - start_time)
+
+    def _apply(self, batch: PresenceBatch):
+        db = self.session_factory()
+        try:
+            room_ids = {room_id for room_id, _ in batch}
+            usernames = {username for _, username in batch}
+            rooms = {room.room_id: room for room in db.query(Room).filter(Room.room_id.in_(room_ids))}
+            users = {user.username: user for user in db.query(User).filter(User.username.in_(usernames))}
+
+            for (room_id, username), joined in batch.items():
+                room = rooms.get(room_id)
+                user = users.get(username)
+                if room is None or user is None:
+                    continue
+                if joined and user not in room.participants:
+                    room.participants.append(user)
+                elif not joined and user in room.participants:
+                    room.participants.remove(user)
+
+            db.commit()
+        finally:
+            db.close()
+
+    async def close(self):
+        """Stop the worker and flush whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Optional
+from urllib.parse import urlencode
+from fastapi import WebSocket, WebSocketDisconnect
+from app.core.config import settings
+from app.signaling import frames
+from app.api.metrics import PROXIED_CONNECTIONS
+
+# Query flag marking a connection already routed by a node; the receiver serves it as is
+AFFINITY_HOP = "routed"
+# Close code after a redirect message (application range, mirrors HTTP 307)
+REDIRECT_CLOSE_CODE = 4307
+# Close codes that only describe a local event and cannot be sent on
+_RESERVED_CLOSE_CODES = {1005, 1006, 1015}
+
+
+def owner_url(node_url: str, room_id: str, websocket: WebSocket) -> str:
+    """The owner node's signaling URL for this client, carrying its query (token included)"""
+    query = dict(websocket.query_params)
+    query[AFFINITY_HOP] = "1"
+    return f"{node_url.rstrip('/')}/ws/signaling/{room_id}?{urlencode(query)}"
+
+
+async def proxy(websocket: WebSocket, url: str, subprotocol: Optional[str]) -> bool:
+    """
+    Pipe a client socket to the room's owner node, frame for frame, until
+    either side closes. Returns False, without accepting the client, if the
+    owner cannot be reached.
+    """
+    import websockets
+    try:
+        upstream = await asyncio.wait_for(
+            websockets.connect(
+                url,
+                subprotocols=[subprotocol] if subprotocol else None,
+                # SIGNALING_MAX_FRAME_BYTES caps what clients send; the owner's frames have no such cap
+                max_size=None
+            ),
+            settings.SIGNALING_SEND_TIMEOUT
+        )
+    except Exception as e:
+        print(f"Could not reach room owner for proxying: {e}")
+        return False
+
+    await websocket.accept(subprotocol=subprotocol)
+    PROXIED_CONNECTIONS.inc()
+
+    async def client_to_owner():
+        while True:
+            try:
+                # Oversized frames go through too; the owner applies the frame limit and its action
+                data = await frames.receive_frame(websocket)
+            except WebSocketDisconnect as e:
+                # A dropped client leaves its session held on the owner for a resume
+                return 1001 if e.code in _RESERVED_CLOSE_CODES else e.code
+            await upstream.send(data)
+
+    async def owner_to_client():
+        async for data in upstream:
+            if isinstance(data, bytes):
+                await websocket.send_bytes(data)
+            else:
+                await websocket.send_text(data)
+
+    tasks = [asyncio.ensure_future(client_to_owner()), asyncio.ensure_future(owner_to_client())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        # Pass the close code on to whichever side is still open
+        client_code = tasks[0].result() if tasks[0] in done and not tasks[0].exception() else None
+        if client_code is not None:
+            await upstream.close(code=client_code)
+        else:
+            await upstream.close()
+            try:
+                await websocket.close(code=upstream.close_code or 1011)
+            except Exception:
+                pass
+    finally:
+        PROXIED_CONNECTIONS.dec()
+    return True
@@ -0,0 +1,123 @@
+import math
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+from app.api.metrics import (
+    STATS_REPORTS, CALL_RTT, CALL_LOSS, CALL_JITTER, CALL_BITRATE,
+    CALL_RTT_BUCKETS, CALL_LOSS_BUCKETS, CALL_JITTER_BUCKETS, CALL_BITRATE_BUCKETS
+)
+
+# stats report key -> (metric, scale to base units, bucket upper bounds in base units)
+REPORT_FIELDS = {
+    "rtt": ("rtt", 1e-3, CALL_RTT_BUCKETS),  # ms
+    "loss": ("loss", 1e-2, CALL_LOSS_BUCKETS),  # percent
+    "jitter": ("jitter", 1e-3, CALL_JITTER_BUCKETS),  # ms
+    "kbps": ("bitrate", 1e3, CALL_BITRATE_BUCKETS),  # kbit/s
+}
+# metric -> node-wide Prometheus histogram, with the same buckets
+NODE_HISTOGRAMS = {"rtt": CALL_RTT, "loss": CALL_LOSS, "jitter": CALL_JITTER, "bitrate": CALL_BITRATE}
+
+MAX_REPORTS_PER_MESSAGE = 32
+
+
+class FixedHistogram:
+    """Counts per bucket plus sum and count; memory does not grow with samples"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bound plus the overflow (+Inf) bucket
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs in Prometheus order"""
+        buckets = []
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            buckets.append((repr(float(bound)), total))
+        buckets.append(("+Inf", total + self.counts[-1]))
+        return buckets
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th sample (None when empty or past the last bound)"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return None
+
+
+class RoomQuality:
+    __slots__ = ("histograms", "reports")
+
+    def __init__(self):
+        self.histograms = {metric: FixedHistogram(bounds) for metric, _, bounds in REPORT_FIELDS.values()}
+        self.reports = 0
+
+
+class QualityAggregator:
+    """
+    Streams client getStats reports into per-room RTT, loss, jitter and
+    bitrate histograms. Each room holds a fixed set of buckets however many
+    reports arrive, and is dropped when its last local member leaves. Every
+    report also feeds the node-wide signaling_call_* Prometheus histograms,
+    which carry no room label.
+    """
+
+    def __init__(self):
+        self._rooms: Dict[str, RoomQuality] = {}
+
+    def record(self, room_id: str, reports: Any) -> int:
+        """
+        Fold a stats message's reports into the room. Malformed entries and
+        fields are skipped; returns how many reports were used.
+        """
+        if not isinstance(reports, list):
+            return 0
+        room = self._rooms.get(room_id)
+        if room is None:
+            room = self._rooms[room_id] = RoomQuality()
+
+        used = 0
+        for report in reports[:MAX_REPORTS_PER_MESSAGE]:
+            if not isinstance(report, dict):
+                continue
+            observed = False
+            for key, (metric, scale, _) in REPORT_FIELDS.items():
+                value = report.get(key)
+                if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                        and math.isfinite(value) and value >= 0:
+                    room.histograms[metric].observe(value * scale)
+                    NODE_HISTOGRAMS[metric].observe(value * scale)
+                    observed = True
+            if observed:
+                used += 1
+
+        room.reports += used
+        STATS_REPORTS.inc(used)
+        return used
+
+    def summary(self, room_id: str) -> Optional[Dict[str, Any]]:
+        """Median and p95 per metric for one room, in base units"""
+        room = self._rooms.get(room_id)
+        if room is None:
+            return None
+        result: Dict[str, Any] = {"reports": room.reports}
+        for metric, histogram in room.histograms.items():
+            result[metric] = {"p50": histogram.quantile(0.5), "p95": histogram.quantile(0.95)}
+        return result
+
+    def discard(self, room_id: str):
+        self._rooms.pop(room_id, None)
@@ -0,0 +1,185 @@
+import asyncio
+import time
+from typing import Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.api.metrics import RATE_LIMITED
+
+ALLOW = "allow"
+DROP = "drop"
+THROTTLE = "throttle"
+CLOSE = "close"
+
+# Fallback bucket for message types without their own limit
+DEFAULT_TYPE = "*"
+
+# (tokens per second, burst)
+Limit = Tuple[float, float]
+# in_use(room_id, username) for a connection's buckets, in_use(room_id, None) for a room's
+InUseFn = Callable[[str, Optional[str]], bool]
+
+
+def parse_limits(spec: str) -> Dict[str, Limit]:
+    """Parse "offer=5:20,candidate=50:200,*=10:50" into {type: (rate, burst)}"""
+    limits: Dict[str, Limit] = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        msg_type, _, values = item.partition("=")
+        rate, _, burst = values.partition(":")
+        try:
+            limits[msg_type.strip()] = (float(rate), float(burst or rate))
+        except ValueError:
+            print(f"Ignoring bad rate limit {item!r}")
+    return limits
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refilled(self, now: float) -> bool:
+        """True once the bucket is back to full, when it is no different from a new one"""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+    def take(self, now: float, max_wait: float = 0.0) -> float:
+        """
+        Spend a token; returns 0 if one was available, else seconds until the
+        next one. A wait within max_wait reserves that token for the caller.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        wait = (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+        if wait <= max_wait:
+            self.tokens -= 1
+        return wait
+
+
+class RateLimiter:
+    """
+    Token buckets per message type, for each connection and for each room as
+    a whole. A message over either limit is dropped, delayed until a token
+    frees up (throttle, up to max_delay; beyond that it is dropped), or gets
+    the socket closed, depending on action.
+
+    Buckets outlive their connection, so leaving and rejoining does not
+    refill them. sweep() forgets a connection's or a room's buckets only
+    once no live connection uses them and they have all refilled on their
+    own, at which point they hold nothing a fresh set would not.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Limit]] = None, room_limits: Optional[Dict[str, Limit]] = None,
+                 action: Optional[str] = None, max_delay: Optional[float] = None,
+                 in_use: Optional[InUseFn] = None, sweep_interval: Optional[float] = None):
+        self.limits = parse_limits(settings.SIGNALING_RATE_LIMITS) if limits is None else limits
+        self.room_limits = parse_limits(settings.SIGNALING_ROOM_RATE_LIMITS) if room_limits is None else room_limits
+        self.action = action or settings.SIGNALING_RATE_LIMIT_ACTION
+        self.max_delay = settings.SIGNALING_RATE_LIMIT_MAX_DELAY if max_delay is None else max_delay
+        self.in_use = in_use or (lambda room_id, username: False)
+        self.sweep_interval = settings.SIGNALING_RATE_LIMIT_SWEEP_INTERVAL if sweep_interval is None else sweep_interval
+        self._next_sweep = 0.0
+        # (room_id, username) -> type -> bucket; kept per user so reconnecting does not refill them
+        self._users: Dict[Tuple[str, str], Dict[str, TokenBucket]] = {}
+        # room_id -> type -> bucket, shared by everyone in the room
+        self._rooms: Dict[str, Dict[str, TokenBucket]] = {}
+
+    def _bucket(self, buckets: Dict[str, TokenBucket], limits: Dict[str, Limit],
+                msg_type: str, now: float) -> Optional[TokenBucket]:
+        key = msg_type if msg_type in limits else DEFAULT_TYPE
+        bucket = buckets.get(key)
+        if bucket is None:
+            limit = limits.get(key)
+            if limit is None:
+                return None
+            bucket = buckets[key] = TokenBucket(limit[0], limit[1], now)
+        return bucket
+
+    def meter(self, room_id: str, username: str) -> "RateMeter":
+        """Where a connection's messages are charged, to its own buckets and its room's"""
+        return RateMeter(self, self._users.setdefault((room_id, username), {}), self._rooms.setdefault(room_id, {}))
+
+    async def over_limit(self, msg_type: str, wait: float, scope: str) -> str:
+        """
+        What to do with a message its connection's meter found over a limit.
+        Receive loops charge the meter first, so a message within its limits
+        costs no await.
+        """
+        # Unknown types share one label so clients cannot mint new series
+        label = msg_type if isinstance(msg_type, str) and (msg_type in self.limits or msg_type in self.room_limits) \
+            and msg_type != DEFAULT_TYPE else "other"
+        if self.action == CLOSE:
+            RATE_LIMITED.labels(scope=scope, type=label, action=CLOSE).inc()
+            return CLOSE
+        if self.action == THROTTLE and wait <= self.max_delay:
+            RATE_LIMITED.labels(scope=scope, type=label, action=THROTTLE).inc()
+            # Not reading from this socket while we wait pushes back on the sender
+            await asyncio.sleep(wait)
+            return ALLOW
+        RATE_LIMITED.labels(scope=scope, type=label, action=DROP).inc()
+        return DROP
+
+    def sweep(self, now: Optional[float] = None):
+        """Drop unused, refilled buckets; does nothing until sweep_interval has passed since the last sweep"""
+        now = time.monotonic() if now is None else now
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        for key in [key for key, buckets in self._users.items()
+                    if not self.in_use(*key) and all(b.refilled(now) for b in buckets.values())]:
+            del self._users[key]
+        for room_id in [room_id for room_id, buckets in self._rooms.items()
+                        if not self.in_use(room_id, None) and all(b.refilled(now) for b in buckets.values())]:
+            del self._rooms[room_id]
+
+
+class RateMeter:
+    """
+    One connection's side of the limiter: the buckets each message type
+    charges, for the connection and for its room, resolved on first use
+    """
+
+    __slots__ = ("limiter", "user_buckets", "room_buckets", "max_wait", "_resolved")
+
+    def __init__(self, limiter: RateLimiter, user_buckets: Dict[str, TokenBucket],
+                 room_buckets: Dict[str, TokenBucket]):
+        self.limiter = limiter
+        self.user_buckets = user_buckets
+        self.room_buckets = room_buckets
+        # Throttled messages still pay for their token, so waiting does not raise the rate
+        self.max_wait = limiter.max_delay if limiter.action == THROTTLE else 0.0
+        self._resolved: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+
+    def _resolve(self, msg_type: str, now: float) -> Tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        limiter = self.limiter
+        buckets = self._resolved[msg_type] = (
+            limiter._bucket(self.user_buckets, limiter.limits, msg_type, now),
+            limiter._bucket(self.room_buckets, limiter.room_limits, msg_type, now)
+        )
+        return buckets
+
+    def check(self, msg_type: Optional[str]) -> Tuple[float, str]:
+        """
+        Charge a message to the connection and its room; returns (wait, scope
+        that limited it). msg_type is a validated type, or None.
+        """
+        now = time.monotonic()
+        limiter = self.limiter
+        # Types without a limit of their own share the fallback entry, so clients cannot grow the cache
+        key = msg_type if msg_type in limiter.limits or msg_type in limiter.room_limits else DEFAULT_TYPE
+        user_bucket, room_bucket = self._resolved.get(key) or self._resolve(key, now)
+        if user_bucket is not None:
+            wait = user_bucket.take(now, self.max_wait)
+            if wait:
+                return wait, "connection"
+        if room_bucket is not None:
+            wait = room_bucket.take(now, self.max_wait)
+            if wait:
+                return wait, "room"
+        return 0.0, ""
@@ -0,0 +1,104 @@
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from fastapi import WebSocket
+from app.signaling.outbound import OutboundQueue
+
+
+class Connection:
+    """One signaling socket and its bookkeeping"""
+
+    __slots__ = ("websocket", "username", "room_id", "joined_at", "queue", "session", "messages_in", "messages_out")
+
+    def __init__(self, websocket: WebSocket, username: str, room_id: str, queue: Optional[OutboundQueue] = None):
+        self.websocket = websocket
+        self.username = username
+        self.room_id = room_id
+        self.joined_at = time.time()
+        self.queue = queue
+        self.session = None
+        self.messages_in = 0
+        self.messages_out = 0
+
+    def __repr__(self) -> str:
+        return f"<Connection {self.username}@{self.room_id}>"
+
+
+class ConnectionRegistry:
+    """
+    Single source of truth for local connections: room -> username -> Connection,
+    with user -> rooms and socket -> Connection indexes kept in step
+    """
+
+    def __init__(self):
+        self._rooms: Dict[str, Dict[str, Connection]] = {}
+        # Users are rarely in more than a couple of rooms, so a tuple is far smaller than a set
+        self._user_rooms: Dict[str, Tuple[str, ...]] = {}
+        self._by_socket: Dict[WebSocket, Connection] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_socket)
+
+    def __contains__(self, room_id: str) -> bool:
+        return room_id in self._rooms
+
+    def add(self, websocket: WebSocket, username: str, room_id: str,
+            queue: Optional[OutboundQueue] = None) -> Connection:
+        """Register a connection, replacing any previous one for the same user in the room"""
+        # Ids repeat across every connection and message, so keep a single copy of each
+        username = sys.intern(username)
+        room_id = sys.intern(room_id)
+
+        self.remove(room_id, username)
+        connection = Connection(websocket, username, room_id, queue)
+        self._rooms.setdefault(room_id, {})[username] = connection
+        self._user_rooms[username] = self._user_rooms.get(username, ()) + (room_id,)
+        self._by_socket[websocket] = connection
+        return connection
+
+    def remove(self, room_id: str, username: str) -> Optional[Connection]:
+        """Unregister a user's connection to a room, dropping empty entries"""
+        members = self._rooms.get(room_id)
+        if members is None:
+            return None
+        connection = members.pop(username, None)
+        if connection is None:
+            return None
+
+        if not members:
+            del self._rooms[room_id]
+        rooms = tuple(r for r in self._user_rooms[username] if r != room_id)
+        if rooms:
+            self._user_rooms[username] = rooms
+        else:
+            del self._user_rooms[username]
+        if self._by_socket.get(connection.websocket) is connection:
+            del self._by_socket[connection.websocket]
+        return connection
+
+    def rebind(self, connection: Connection, websocket: WebSocket):
+        """Move a connection to a new socket, e.g. when a session resumes"""
+        if self._by_socket.get(connection.websocket) is connection:
+            del self._by_socket[connection.websocket]
+        connection.websocket = websocket
+        self._by_socket[websocket] = connection
+
+    def get(self, room_id: str, username: str) -> Optional[Connection]:
+        members = self._rooms.get(room_id)
+        return members.get(username) if members is not None else None
+
+    def by_socket(self, websocket: WebSocket) -> Optional[Connection]:
+        return self._by_socket.get(websocket)
+
+    def members(self, room_id: str) -> Dict[str, Connection]:
+        """Connections in a room keyed by username (do not mutate)"""
+        return self._rooms.get(room_id, {})
+
+    def users_in(self, room_id: str) -> List[str]:
+        return list(self._rooms.get(room_id, ()))
+
+    def rooms_of(self, username: str) -> List[str]:
+        return list(self._user_rooms.get(username, ()))
+
+    def room_ids(self) -> Iterator[str]:
+        return iter(self._rooms)
@@ -0,0 +1,80 @@
+import asyncio
+from typing import Callable, Dict, FrozenSet, Optional
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.models.database_models import Room
+
+MEETING = "meeting"
+WEBINAR = "webinar"
+PUBLISHER = "publisher"
+VIEWER = "viewer"
+
+
+class RoomPolicy:
+    """How a room treats its members: everyone publishes, or only presenters do"""
+
+    __slots__ = ("mode", "presenters", "capacity")
+
+    def __init__(self, mode: str = MEETING, presenters: FrozenSet[str] = frozenset(),
+                 capacity: Optional[int] = None):
+        self.mode = mode
+        self.presenters = presenters
+        # Most members connected at once, None for the server default
+        self.capacity = capacity
+
+    @property
+    def is_webinar(self) -> bool:
+        return self.mode == WEBINAR
+
+    def role(self, username: str) -> str:
+        if self.mode == WEBINAR and username not in self.presenters:
+            return VIEWER
+        return PUBLISHER
+
+
+DEFAULT_POLICY = RoomPolicy()
+
+
+class RoomPolicyCache:
+    """
+    Room mode, presenters and capacity, read from the database when a room becomes
+    active on this node and kept until its last local member leaves. Presenter
+    changes made while a room is live apply from its next session.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self._policies: Dict[str, RoomPolicy] = {}
+
+    def get(self, room_id: str) -> RoomPolicy:
+        """The cached policy, or the meeting default for rooms not loaded"""
+        return self._policies.get(room_id, DEFAULT_POLICY)
+
+    async def load(self, room_id: str) -> RoomPolicy:
+        policy = self._policies.get(room_id)
+        if policy is None:
+            try:
+                policy = await asyncio.get_running_loop().run_in_executor(None, self._read, room_id)
+            except Exception as e:
+                print(f"Database error loading room policy: {e}")
+                return DEFAULT_POLICY
+            self._policies[room_id] = policy
+        return policy
+
+    def _read(self, room_id: str) -> RoomPolicy:
+        db = self.session_factory()
+        try:
+            room = db.query(Room).filter(Room.room_id == room_id).first()
+            if room is None:
+                return DEFAULT_POLICY
+            if room.mode != WEBINAR:
+                return RoomPolicy(capacity=room.capacity) if room.capacity else DEFAULT_POLICY
+            presenters = {user.username for user in room.presenters if user.username}
+            if room.owner is not None and room.owner.username:
+                presenters.add(room.owner.username)
+            return RoomPolicy(WEBINAR, frozenset(presenters), room.capacity)
+        finally:
+            db.close()
+
+    def discard(self, room_id: str):
+        self._policies.pop(room_id, None)
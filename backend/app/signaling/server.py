@@ -1,13 +1,166 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
+from sqlalchemy.orm import Session
 from typing import Dict
 import json
 import uuid
 from app.signaling.manager import connection_manager
-from app.core.auth_middleware import get_current_username_ws
+from app.signaling import frames
+from app.signaling.room_policy import PUBLISHER
+from app.signaling.negotiation import negotiation_role
+from app.signaling.ratelimit import ALLOW, CLOSE
+from app.signaling.dispatch import Dispatcher, MessageContext
+from app.signaling.proxy import AFFINITY_HOP, REDIRECT_CLOSE_CODE, owner_url, proxy
+from app.schemas.webrtc import (
+    Offer, Answer, IceCandidate, IceCandidates, SfuPublish, SfuAnswer, Connected, Stats,
+    RoomStateRequest, Heartbeat, Pong, LeaveRoom
+)
+from app.api.metrics import FRAMES_TOO_LARGE, ROOM_ROUTES
+from app.core.config import settings
+from app.core.auth_middleware import get_current_username_ws, get_current_user
+from app.models.database_models import Room, User
+from app.utils.database import get_db
 
 # Create a separate FastAPI app for WebSocket signaling
 signaling_app = FastAPI()
 
+# Message type -> schema and handler for everything clients send
+dispatcher = Dispatcher()
+
+@dispatcher.on(Offer)
+async def handle_offer(context: MessageContext, message: Offer):
+    """Forward an offer to the target user"""
+    room_id, username, target_user = context.room_id, context.username, message["target"]
+    if not connection_manager.may_signal(room_id, username, target_user):
+        return
+    if not connection_manager.negotiations.offer(room_id, username, target_user):
+        # Crossed with the peer's offer and lost; the sender rolls back and answers theirs
+        await connection_manager.send_personal_message({
+            "type": "offer_suppressed",
+            "target": target_user
+        }, context.websocket)
+        return
+    # Keep candidates for this pair ordered before the new description
+    await connection_manager.candidates.flush(room_id, username, target_user)
+    connection_manager.setups.offer(room_id, username, target_user)
+    await connection_manager.send_to_user(
+        room_id, target_user, {
+            "type": "offer",
+            "from": username,
+            "role": negotiation_role(target_user, username),
+            "sdp": message["sdp"]
+        }
+    )
+
+@dispatcher.on(Answer)
+async def handle_answer(context: MessageContext, message: Answer):
+    """Forward an answer to the target user"""
+    room_id, username, target_user = context.room_id, context.username, message["target"]
+    if not connection_manager.may_signal(room_id, username, target_user):
+        return
+    # Keep candidates for this pair ordered before the new description
+    await connection_manager.candidates.flush(room_id, username, target_user)
+    connection_manager.setups.answer(room_id, username, target_user)
+    connection_manager.negotiations.answer(room_id, username, target_user)
+    await connection_manager.send_to_user(
+        room_id, target_user, {
+            "type": "answer",
+            "from": username,
+            "sdp": message["sdp"]
+        }
+    )
+
+@dispatcher.on(IceCandidate)
+async def handle_candidate(context: MessageContext, message: IceCandidate):
+    """Coalesce ICE candidates per target before forwarding"""
+    if connection_manager.may_signal(context.room_id, context.username, message["target"]):
+        connection_manager.setups.candidate(context.room_id, context.username, message["target"])
+        await connection_manager.candidates.add(
+            context.room_id, context.username, message["target"], [message["candidate"]]
+        )
+
+@dispatcher.on(IceCandidates)
+async def handle_candidates(context: MessageContext, message: IceCandidates):
+    """Batch of ICE candidates sent in one frame"""
+    if connection_manager.may_signal(context.room_id, context.username, message["target"]):
+        connection_manager.setups.candidate(context.room_id, context.username, message["target"])
+        await connection_manager.candidates.add(
+            context.room_id, context.username, message["target"], message["candidates"]
+        )
+
+@dispatcher.on(SfuPublish)
+async def handle_sfu_publish(context: MessageContext, message: SfuPublish):
+    """Client sends its media once to the server instead of to every peer"""
+    if connection_manager.sfu is not None \
+            and connection_manager.policies.get(context.room_id).role(context.username) == PUBLISHER:
+        await connection_manager.sfu.publish(context.room_id, context.username, message["sdp"])
+
+@dispatcher.on(SfuAnswer)
+async def handle_sfu_answer(context: MessageContext, message: SfuAnswer):
+    """Client accepted a stream the server offered it"""
+    if connection_manager.sfu is not None:
+        await connection_manager.sfu.answer(context.room_id, context.username, message["publisher"], message["sdp"])
+
+@dispatcher.on(Connected)
+async def handle_connected(context: MessageContext, message: Connected):
+    """Client's peer connection with this peer reached the connected state"""
+    connection_manager.setups.connected(context.room_id, context.username, message["peer"])
+
+@dispatcher.on(Stats)
+async def handle_stats(context: MessageContext, message: Stats):
+    """Periodic getStats summary from the client, one report per peer connection"""
+    await connection_manager.record_stats(context.room_id, context.username, message["reports"])
+
+@dispatcher.on(RoomStateRequest)
+async def handle_room_state_request(context: MessageContext, message: RoomStateRequest):
+    """Client missed a roster version and wants a fresh snapshot"""
+    await connection_manager.send_room_state(context.connection)
+
+@dispatcher.on(Heartbeat)
+async def handle_heartbeat(context: MessageContext, message: Heartbeat):
+    """Respond to heartbeat"""
+    await connection_manager.send_personal_message({
+        "type": "heartbeat_response"
+    }, context.websocket)
+
+@dispatcher.on(Pong)
+async def handle_pong(context: MessageContext, message: Pong):
+    """Reply to a server ping; receiving it already counted as activity"""
+
+@dispatcher.on(LeaveRoom)
+async def handle_leave(context: MessageContext, message: LeaveRoom):
+    """Explicit hang-up: drop the session now instead of holding it for a resume"""
+    await connection_manager.leave(context.username, context.room_id, context.connection)
+    return True
+
+@signaling_app.get("/setups/slowest")
+async def slowest_setups(limit: int = 20, current_user: User = Depends(get_current_user),
+                         db: Session = Depends(get_db)):
+    """Slowest recent offer-to-connected setups on this node, for debugging; only rooms the caller owns"""
+    owned = {room_id for room_id, in db.query(Room.room_id).filter(Room.owner_id == current_user.id)}
+    return connection_manager.setups.slowest(limit, rooms=owned)
+
+async def route_to_owner(websocket: WebSocket, room_id: str, subprotocol, encoding: str) -> bool:
+    """Redirect or proxy the client to the room's owner node; False to serve the room here"""
+    node_url = await connection_manager.route(room_id)
+    if node_url is None:
+        ROOM_ROUTES.labels(result="local").inc()
+        return False
+    
+    if settings.SIGNALING_ROOM_AFFINITY == "redirect":
+        # The client reconnects to the owner itself; no hop through this node
+        ROOM_ROUTES.labels(result="redirect").inc()
+        await websocket.accept(subprotocol=subprotocol)
+        await connection_manager._send_direct(websocket, {"type": "redirect", "url": node_url}, encoding)
+        await websocket.close(code=REDIRECT_CLOSE_CODE)
+        return True
+    
+    if await proxy(websocket, owner_url(node_url, room_id, websocket), subprotocol):
+        ROOM_ROUTES.labels(result="proxy").inc()
+        return True
+    ROOM_ROUTES.labels(result="fallback").inc()
+    return False
+
+
 @signaling_app.websocket("/signaling/{room_id}")
 async def websocket_endpoint(
     websocket: WebSocket, 
@@ -18,77 +171,89 @@ async def websocket_endpoint(
     WebSocket endpoint for WebRTC signaling
     Protected by JWT authentication
     Uses username instead of user_id for identification
+    Speaks JSON by default, or MessagePack when the client offers the
+    "linksphere.msgpack" subprotocol
     """
-    # Connect the user to the room using username
-    await connection_manager.connect(websocket, username, room_id)
+    # Negotiate the wire format (JSON unless the client asks for MessagePack)
+    subprotocol, encoding = frames.negotiate_subprotocol(websocket.scope.get("subprotocols", []))
+    
+    # A reconnecting client presents its resume token and the last seq it saw;
+    # if the session is still held it picks up where it left off
+    connection = None
+    resume_token = websocket.query_params.get("resume")
+    if resume_token:
+        try:
+            last_seq = int(websocket.query_params.get("last_seq", 0))
+        except ValueError:
+            last_seq = 0
+        connection = await connection_manager.resume(
+            websocket, username, room_id, resume_token, last_seq, subprotocol, encoding
+        )
+    
+    # A room lives on the one node that owns it: send new connections there, unless
+    # a node already did. If the owner is unreachable the room is served here and
+    # the backplane bridges the two nodes
+    if connection is None and not websocket.query_params.get(AFFINITY_HOP):
+        if await route_to_owner(websocket, room_id, subprotocol, encoding):
+            return
     
-    # Notify all users in the room that a new user joined
-    await connection_manager.broadcast_to_room(room_id, {
-        "type": "user_joined",
-        "username": username,
-        "room_id": room_id
-    })
+    # Otherwise connect the user to the room using username; the joiner gets a
+    # room_state snapshot and existing members a roster_delta
+    if connection is None:
+        connection = await connection_manager.connect(websocket, username, room_id, subprotocol, encoding)
+        if connection is None:
+            # Refused by admission control; the client was told why and when to retry
+            return
     
+    context = MessageContext(websocket, connection, username, room_id)
+    meter = connection_manager.rate_limits.meter(room_id, username)
     try:
         while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            # Process different message types
-            msg_type = message.get("type")
-            
-            if msg_type == "offer":
-                # Forward offer to the target user
-                target_user = message.get("target")
-                if target_user:
-                    await connection_manager.send_to_user(
-                        room_id, target_user, {
-                            "type": "offer",
-                            "from": username,
-                            "sdp": message.get("sdp")
-                        }
-                    )
+            # Receive a frame from the client (text JSON or binary MessagePack),
+            # refusing oversized frames before they are parsed
+            try:
+                data = frames.frame_data(await websocket.receive(), settings.SIGNALING_MAX_FRAME_BYTES)
+            except frames.FrameTooLarge:
+                FRAMES_TOO_LARGE.inc()
+                if settings.SIGNALING_RATE_LIMIT_ACTION == CLOSE:
+                    connection.queue.shutdown(1009)
+                    await connection_manager.leave(username, room_id, connection)
+                    return
+                continue
+            if connection.websocket is not websocket:
+                # The session resumed on a newer socket; this one is being closed
+                return
+            connection.messages_in += 1
+            connection_manager.liveness.touch(connection)
             
-            elif msg_type == "answer":
-                # Forward answer to the target user
-                target_user = message.get("target")
-                if target_user:
-                    await connection_manager.send_to_user(
-                        room_id, target_user, {
-                            "type": "answer",
-                            "from": username,
-                            "sdp": message.get("sdp")
-                        }
-                    )
+            # Decode and validate against the message type's schema; None if malformed or unknown
+            message = dispatcher.decode(data)
             
-            elif msg_type == "candidate":
-                # Forward ICE candidate to the target user
-                target_user = message.get("target")
-                if target_user:
-                    await connection_manager.send_to_user(
-                        room_id, target_user, {
-                            "type": "candidate",
-                            "from": username,
-                            "candidate": message.get("candidate")
-                        }
-                    )
+            # Per-user and per-room token buckets: over the limit the message is
+            # dropped, delayed, or the socket is closed (policy violation).
+            # Rejected frames count against the catch-all bucket.
+            msg_type = message["type"] if message is not None else None
+            wait, scope = meter.check(msg_type)
+            if wait:
+                verdict = await connection_manager.rate_limits.over_limit(msg_type, wait, scope)
+                if verdict == CLOSE:
+                    connection.queue.shutdown(1008)
+                    await connection_manager.leave(username, room_id, connection)
+                    return
+                if verdict != ALLOW:
+                    continue
             
-            elif msg_type == "heartbeat":
-                # Respond to heartbeat
-                await connection_manager.send_personal_message({
-                    "type": "heartbeat_response"
-                }, websocket)
+            if message is not None and await dispatcher.dispatch(context, message):
+                return
                 
-    except WebSocketDisconnect:
-        # Handle client disconnection
-        connection_manager.disconnect(username, room_id)
-        # Notify others that user left
-        await connection_manager.broadcast_to_room(room_id, {
-            "type": "user_left",
-            "username": username,
-            "room_id": room_id
-        })
+    except WebSocketDisconnect as e:
+        # Clean closes leave right away; dropped sockets hold the session for a resume
+        await connection_manager.closed(connection, websocket, e.code)
     except Exception as e:
+        if connection.websocket is not websocket:
+            # A socket the session already moved off; the newer one is unaffected
+            return
         print(f"Error in websocket connection: {e}")
-        connection_manager.disconnect(username, room_id)
\ No newline at end of file
+        # Close the socket and leave properly, so peers drop this user from their rosters
+        connection.queue.shutdown(1011)
+        await connection_manager.leave(username, room_id, connection)
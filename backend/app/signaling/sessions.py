@@ -0,0 +1,86 @@
+import asyncio
+import secrets
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.signaling.frames import Frame
+
+# Control messages that only make sense on the socket they were sent to
+UNBUFFERED_TYPES = {"ping", "heartbeat_response", "session"}
+
+
+class Session:
+    """
+    Resumable signaling session: numbers every message sent to a user and
+    keeps the most recent ones so a reconnect can replay what it missed
+    """
+
+    __slots__ = ("token", "connection", "buffer", "next_seq", "expiry")
+
+    def __init__(self, token: str, connection, buffer_size: int):
+        self.token = token
+        self.connection = connection
+        self.buffer: Deque[Tuple[int, Frame]] = deque(maxlen=buffer_size)
+        self.next_seq = 1
+        self.expiry: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def suspended(self) -> bool:
+        return self.expiry is not None
+
+    def record(self, frame: Frame) -> int:
+        """Assign the next sequence number to a frame and keep it for replay"""
+        seq = self.next_seq
+        self.next_seq += 1
+        self.buffer.append((seq, frame))
+        return seq
+
+    def replay_after(self, last_seq: int) -> Optional[List[Tuple[int, Frame]]]:
+        """Frames the client has not seen, or None if some already fell out of the buffer"""
+        if last_seq >= self.next_seq:
+            return None
+        if self.buffer and self.buffer[0][0] > last_seq + 1:
+            return None
+        if not self.buffer and last_seq + 1 < self.next_seq:
+            return None
+        return [(seq, frame) for seq, frame in self.buffer if seq > last_seq]
+
+
+class SessionStore:
+    """Resume tokens for this process, with a grace timer for dropped sockets"""
+
+    def __init__(self, on_expire: Callable[[Session], None],
+                 grace: Optional[float] = None, buffer_size: Optional[int] = None):
+        self.on_expire = on_expire
+        self.grace = settings.SIGNALING_RESUME_GRACE if grace is None else grace
+        self.buffer_size = buffer_size or settings.SIGNALING_REPLAY_BUFFER
+        self._sessions: Dict[str, Session] = {}
+
+    def open(self, connection) -> Session:
+        session = Session(secrets.token_urlsafe(24), connection, self.buffer_size)
+        self._sessions[session.token] = session
+        return session
+
+    def get(self, token: str) -> Optional[Session]:
+        return self._sessions.get(token)
+
+    def suspend(self, session: Session):
+        """Keep a session alive for the grace period after its socket dropped"""
+        if session.expiry is None:
+            loop = asyncio.get_running_loop()
+            session.expiry = loop.call_later(self.grace, self._expire, session.token)
+
+    def resume(self, session: Session):
+        if session.expiry is not None:
+            session.expiry.cancel()
+            session.expiry = None
+
+    def close(self, session: Session):
+        self.resume(session)
+        self._sessions.pop(session.token, None)
+
+    def _expire(self, token: str):
+        session = self._sessions.pop(token, None)
+        if session is not None:
+            session.expiry = None
+            self.on_expire(session)
@@ -0,0 +1,141 @@
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Container, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.api.metrics import SETUP_OFFER_TO_ANSWER, SETUP_OFFER_TO_CANDIDATE, SETUP_OFFER_TO_CONNECTED
+
+# room_id -> (topology, participant count) at the time of the offer
+ContextFn = Callable[[str], Tuple[str, int]]
+PairKey = Tuple[str, str, str]  # (room_id, offerer, answerer)
+
+
+def size_bucket(participants: int) -> str:
+    """Room size as a small, fixed set of label values"""
+    if participants <= 2:
+        return "2"
+    if participants <= 4:
+        return "3-4"
+    if participants <= 8:
+        return "5-8"
+    if participants <= 16:
+        return "9-16"
+    return "17+"
+
+
+class _Setup:
+    __slots__ = ("started", "topology", "size", "answered", "first_candidate")
+
+    def __init__(self, started: float, topology: str, size: str):
+        self.started = started
+        self.topology = topology
+        self.size = size
+        self.answered: Optional[float] = None
+        self.first_candidate: Optional[float] = None
+
+
+class SetupTracker:
+    """
+    Times each peer pair's connection setup as it passes through the relay:
+    offer to answer, offer to first candidate, and offer to the connected
+    event the client reports. Unfinished setups are capped at max_pending
+    (oldest dropped first); the slowest completed ones within the last
+    slow_window seconds are kept for debugging.
+    """
+
+    def __init__(self, context: ContextFn, max_pending: Optional[int] = None,
+                 keep_slowest: Optional[int] = None, slow_window: Optional[float] = None):
+        self.context = context
+        self.max_pending = max_pending or settings.SIGNALING_SETUP_MAX_PENDING
+        self.keep_slowest = keep_slowest or settings.SIGNALING_SETUP_KEEP_SLOWEST
+        self.slow_window = slow_window or settings.SIGNALING_SETUP_SLOW_WINDOW
+        self._pending: "OrderedDict[PairKey, _Setup]" = OrderedDict()
+        # Min-heap of (duration, tiebreak, details), so the fastest of the kept setups goes first
+        self._slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._tiebreak = itertools.count()
+
+    def _find(self, room_id: str, a: str, b: str) -> Tuple[Optional[PairKey], Optional[_Setup]]:
+        # Candidates and the connected event can come from either side of the pair
+        for key in ((room_id, a, b), (room_id, b, a)):
+            setup = self._pending.get(key)
+            if setup is not None:
+                return key, setup
+        return None, None
+
+    def offer(self, room_id: str, sender: str, target: str):
+        topology, participants = self.context(room_id)
+        key = (room_id, sender, target)
+        # A new offer (renegotiation, or glare from the other side) restarts the clock
+        self._pending.pop(key, None)
+        self._pending.pop((room_id, target, sender), None)
+        self._pending[key] = _Setup(time.monotonic(), topology, size_bucket(participants))
+        while len(self._pending) > self.max_pending:
+            self._pending.popitem(last=False)
+
+    def answer(self, room_id: str, sender: str, target: str):
+        setup = self._pending.get((room_id, target, sender))
+        if setup is not None and setup.answered is None:
+            setup.answered = time.monotonic()
+            SETUP_OFFER_TO_ANSWER.labels(topology=setup.topology, room_size=setup.size).observe(
+                setup.answered - setup.started
+            )
+
+    def candidate(self, room_id: str, sender: str, target: str):
+        _, setup = self._find(room_id, sender, target)
+        if setup is not None and setup.first_candidate is None:
+            setup.first_candidate = time.monotonic()
+            SETUP_OFFER_TO_CANDIDATE.labels(topology=setup.topology, room_size=setup.size).observe(
+                setup.first_candidate - setup.started
+            )
+
+    def connected(self, room_id: str, username: str, peer: str) -> Optional[float]:
+        """Close out a pair's setup; returns the offer-to-connected time"""
+        key, setup = self._find(room_id, username, peer)
+        if setup is None:
+            return None
+        del self._pending[key]
+
+        now = time.monotonic()
+        duration = now - setup.started
+        SETUP_OFFER_TO_CONNECTED.labels(topology=setup.topology, room_size=setup.size).observe(duration)
+        self._remember(duration, key, setup)
+        return duration
+
+    def _remember(self, duration: float, key: PairKey, setup: _Setup):
+        details = {
+            "room_id": key[0],
+            "offerer": key[1],
+            "answerer": key[2],
+            "topology": setup.topology,
+            "room_size": setup.size,
+            "offer_to_answer": setup.answered - setup.started if setup.answered else None,
+            "offer_to_first_candidate": setup.first_candidate - setup.started if setup.first_candidate else None,
+            "offer_to_connected": duration,
+            "finished_at": time.time(),
+        }
+        entry = (duration, next(self._tiebreak), details)
+        if len(self._slowest) >= self.keep_slowest:
+            self._prune()
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def _prune(self):
+        """Drop kept setups older than the window so newer ones can take their place"""
+        cutoff = time.time() - self.slow_window
+        self._slowest = [entry for entry in self._slowest if entry[2]["finished_at"] >= cutoff]
+        heapq.heapify(self._slowest)
+
+    def slowest(self, limit: Optional[int] = None, rooms: Optional[Container[str]] = None) -> List[Dict[str, Any]]:
+        """The slowest recent setups, slowest first; only those in rooms, if given"""
+        self._prune()
+        entries = sorted(self._slowest, key=lambda entry: entry[0], reverse=True)
+        if rooms is not None:
+            entries = [entry for entry in entries if entry[2]["room_id"] in rooms]
+        return [details for _, _, details in entries[:limit]]
+
+    def discard_user(self, room_id: str, username: str):
+        for key in [key for key in self._pending if key[0] == room_id and username in key[1:]]:
+            del self._pending[key]
@@ -0,0 +1,189 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.api.metrics import SFU_PUBLISHERS, SFU_SUBSCRIPTIONS, SFU_SUBSCRIPTIONS_REFUSED
+
+# aiortc is optional; without it every room stays a peer-to-peer mesh
+try:
+    from aiortc import RTCPeerConnection, RTCSessionDescription
+    from aiortc.contrib.media import MediaRelay
+    AIORTC_AVAILABLE = True
+except ImportError:
+    AIORTC_AVAILABLE = False
+
+# (room_id, username, message) -> delivered to that user's socket
+SendFn = Callable[[str, str, dict], Awaitable[Any]]
+
+
+def _description(pc) -> dict:
+    return {"type": pc.localDescription.type, "sdp": pc.localDescription.sdp}
+
+
+class Publisher:
+    """A client's single upstream peer connection and the tracks it sends"""
+
+    __slots__ = ("pc", "tracks")
+
+    def __init__(self, pc):
+        self.pc = pc
+        self.tracks = []
+
+
+class SelectiveForwarder:
+    """
+    Server-side forwarding unit. Each participant publishes once over one
+    upstream peer connection, and the server relays every published track to
+    the rest of the room over one downstream peer connection per
+    (subscriber, publisher) pair. Descriptions travel over the signaling
+    socket as sfu_* messages; aiortc gathers candidates up front, so there is
+    no trickle ICE on this path.
+
+    Incoming tracks are read once and shared through a MediaRelay. aiortc only
+    hands out decoded frames from a receiver, so each downstream sender still
+    encodes its own copy. That encode is the expensive part, so the node
+    holds at most max_subscriptions downstream connections.
+    """
+
+    def __init__(self, send: SendFn, max_subscriptions: Optional[int] = None):
+        self.send = send
+        self.max_subscriptions = settings.SIGNALING_SFU_MAX_SUBSCRIPTIONS if max_subscriptions is None \
+            else max_subscriptions
+        self.relay = MediaRelay()
+        # room_id -> username -> Publisher
+        self._publishers: Dict[str, Dict[str, Publisher]] = {}
+        # (room_id, subscriber, publisher) -> downstream peer connection
+        self._subscriptions: Dict[Tuple[str, str, str], Any] = {}
+        # room_id -> members who only receive (webinar viewers)
+        self._audience: Dict[str, Set[str]] = {}
+
+    def publishers(self, room_id: str) -> List[str]:
+        return list(self._publishers.get(room_id, ()))
+
+    def subscriptions(self, room_id: str, subscriber: str) -> List[str]:
+        return [key[2] for key in self._subscriptions if key[0] == room_id and key[1] == subscriber]
+
+    def has_room_for(self, subscriptions: int) -> bool:
+        """Whether this many more downstream connections fit under the per-node cap"""
+        return len(self._subscriptions) + subscriptions <= self.max_subscriptions
+
+    async def publish(self, room_id: str, username: str, description: dict):
+        """Answer a client's upstream offer and wire it into the room"""
+        # Publishing again replaces the previous upstream connection
+        await self.unpublish(room_id, username)
+
+        pc = RTCPeerConnection()
+        publisher = Publisher(pc)
+
+        @pc.on("track")
+        def on_track(track):
+            publisher.tracks.append(track)
+
+        @pc.on("connectionstatechange")
+        async def on_connectionstatechange():
+            if pc.connectionState == "failed" and self._publishers.get(room_id, {}).get(username) is publisher:
+                await self.unpublish(room_id, username)
+
+        # Remote tracks are announced while the offer is applied
+        await pc.setRemoteDescription(RTCSessionDescription(sdp=description["sdp"], type=description["type"]))
+        await pc.setLocalDescription(await pc.createAnswer())
+
+        room = self._publishers.setdefault(room_id, {})
+        room[username] = publisher
+        SFU_PUBLISHERS.inc()
+        await self.send(room_id, username, {"type": "sfu_published", "sdp": _description(pc)})
+
+        # The newcomer receives everyone already publishing, and they receive the newcomer
+        for other in list(room):
+            if other != username:
+                await self._subscribe(room_id, username, other)
+                await self._subscribe(room_id, other, username)
+        for viewer in list(self._audience.get(room_id, ())):
+            await self._subscribe(room_id, viewer, username)
+
+    async def watch(self, room_id: str, username: str):
+        """Receive every publisher in the room without publishing anything"""
+        self._audience.setdefault(room_id, set()).add(username)
+        for publisher_name in self.publishers(room_id):
+            if publisher_name != username:
+                await self._subscribe(room_id, username, publisher_name)
+
+    async def _subscribe(self, room_id: str, subscriber: str, publisher_name: str):
+        key = (room_id, subscriber, publisher_name)
+        publisher = self._publishers.get(room_id, {}).get(publisher_name)
+        if key in self._subscriptions or publisher is None or not publisher.tracks:
+            return
+        if len(self._subscriptions) >= self.max_subscriptions:
+            SFU_SUBSCRIPTIONS_REFUSED.inc()
+            print(f"SFU at {self.max_subscriptions} subscriptions; {subscriber} gets no stream from {publisher_name}")
+            return
+
+        pc = RTCPeerConnection()
+        self._subscriptions[key] = pc
+        SFU_SUBSCRIPTIONS.inc()
+        for track in publisher.tracks:
+            pc.addTrack(self.relay.subscribe(track, buffered=False))
+        await pc.setLocalDescription(await pc.createOffer())
+
+        await self.send(room_id, subscriber, {
+            "type": "sfu_offer",
+            "publisher": publisher_name,
+            "sdp": _description(pc)
+        })
+
+    async def answer(self, room_id: str, subscriber: str, publisher_name: str, description: dict):
+        """Apply a subscriber's answer to the downstream connection we offered"""
+        pc = self._subscriptions.get((room_id, subscriber, publisher_name))
+        if pc is None or pc.signalingState != "have-local-offer":
+            return
+        await pc.setRemoteDescription(RTCSessionDescription(sdp=description["sdp"], type=description["type"]))
+
+    async def unpublish(self, room_id: str, username: str):
+        """Stop forwarding a user's upstream and tear down everyone's copy of it"""
+        room = self._publishers.get(room_id)
+        publisher = room.pop(username, None) if room else None
+        if publisher is None:
+            return
+        SFU_PUBLISHERS.dec()
+
+        closing = [publisher.pc.close()]
+        for key in [key for key in self._subscriptions if key[0] == room_id and key[2] == username]:
+            closing.append(self._unsubscribe(key))
+            await self.send(room_id, key[1], {"type": "sfu_unpublished", "publisher": username})
+        await asyncio.gather(*closing, return_exceptions=True)
+
+        if not room:
+            del self._publishers[room_id]
+
+    async def _unsubscribe(self, key: Tuple[str, str, str]):
+        pc = self._subscriptions.pop(key, None)
+        if pc is not None:
+            SFU_SUBSCRIPTIONS.dec()
+            await pc.close()
+
+    async def remove(self, room_id: str, username: str):
+        """Drop everything a departing user sent or received"""
+        audience = self._audience.get(room_id)
+        if audience is not None:
+            audience.discard(username)
+            if not audience:
+                del self._audience[room_id]
+        await self.unpublish(room_id, username)
+        await asyncio.gather(*[
+            self._unsubscribe(key) for key in list(self._subscriptions)
+            if key[0] == room_id and key[1] == username
+        ], return_exceptions=True)
+
+    async def close_room(self, room_id: str):
+        """Stop forwarding a room entirely, e.g. when it goes back to mesh"""
+        users = set(self._publishers.get(room_id, ()))
+        users.update(self._audience.get(room_id, ()))
+        users.update(key[1] for key in self._subscriptions if key[0] == room_id)
+        for username in users:
+            await self.remove(room_id, username)
+
+    async def close(self):
+        for room_id in list(self._publishers):
+            for username in list(self._publishers.get(room_id, ())):
+                await self.remove(room_id, username)
+        await asyncio.gather(*[self._unsubscribe(key) for key in list(self._subscriptions)],
+                             return_exceptions=True)
@@ -0,0 +1,64 @@
+from typing import Dict, Optional
+from app.core.config import settings
+from app.api.metrics import TOPOLOGY_SWITCHES
+
+MESH = "mesh"
+SFU = "sfu"
+
+
+class TopologyController:
+    """
+    Chooses how media flows in each room. Small rooms stay peer-to-peer mesh;
+    once a room grows past mesh_max participants it moves to the server's SFU
+    so every client uploads once however many people join. It only drops back
+    to mesh when the room shrinks to mesh_return, since every switch makes all
+    clients renegotiate.
+    """
+
+    def __init__(self, mesh_max: Optional[int] = None, mesh_return: Optional[int] = None,
+                 sfu_available: bool = True):
+        self.mesh_max = settings.SIGNALING_MESH_MAX_PARTICIPANTS if mesh_max is None else mesh_max
+        self.mesh_return = settings.SIGNALING_MESH_RETURN_PARTICIPANTS if mesh_return is None else mesh_return
+        self.sfu_available = sfu_available
+        # Only rooms that have left the default are stored
+        self._modes: Dict[str, str] = {}
+
+    def mode(self, room_id: str) -> str:
+        return self._modes.get(room_id, MESH)
+
+    def update(self, room_id: str, participants: int, forwardable: bool = True,
+               prefer_sfu: bool = False, sfu_full: bool = False) -> Optional[str]:
+        """
+        Re-evaluate a room after its size changed. Returns the new topology
+        when it switches, None otherwise. forwardable is False when the SFU
+        cannot reach every participant (e.g. some are on other nodes);
+        prefer_sfu forwards the room whatever its size (webinars); sfu_full
+        keeps a mesh room in mesh because the SFU has no capacity left for it.
+        """
+        current = self.mode(room_id)
+        target = current
+
+        if not self.sfu_available or not forwardable:
+            target = MESH
+        elif current == MESH and sfu_full:
+            target = MESH
+        elif prefer_sfu:
+            target = SFU
+        elif current == MESH and participants > self.mesh_max:
+            target = SFU
+        elif current == SFU and participants <= self.mesh_return:
+            target = MESH
+
+        if target == current:
+            return None
+
+        if target == MESH:
+            self._modes.pop(room_id, None)
+        else:
+            self._modes[room_id] = target
+        TOPOLOGY_SWITCHES.labels(topology=target).inc()
+        return target
+
+    def discard(self, room_id: str):
+        """Forget a room that has emptied"""
+        self._modes.pop(room_id, None)
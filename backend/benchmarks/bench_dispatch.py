@@ -0,0 +1,150 @@
+"""
+Microbenchmark: CPU time for one step of the signaling receive loop, from
+awaiting the socket to the handler call, rate limiting included. Both paths
+receive and rate-limit the same way server.py does; they differ only in
+what happens to the frame. The untyped path parses it and walks an if/elif
+chain of message.get calls; the typed path goes through the dispatcher,
+TypeAdapter validation included, so the difference is the cost of
+validation. Both paths parse with each installed JSON backend in turn;
+messages carry the keys the browser client sends.
+
+Run from the backend directory:
+    python -m benchmarks.bench_dispatch
+"""
+import asyncio
+import json
+import time
+from typing import List
+from app.signaling import frames
+from app.signaling.dispatch import Dispatcher, MessageContext
+from app.signaling.ratelimit import ALLOW, RateLimiter, RateMeter
+from app.schemas.webrtc import Offer, IceCandidate, IceCandidates, Stats, Heartbeat
+
+ROUNDS = 5000
+REPEATS = 15
+MAX_FRAME = 65536
+# Limits no benchmark run reaches, so every message is charged and let through
+LIMITER = RateLimiter(limits={"*": (1e9, 1e9)}, room_limits={"*": (1e9, 1e9)})
+
+SDP = "v=0\r\no=- 4611731400430051336 2 IN IP4 127.0.0.1\r\n" + "a=candidate:1 1 udp 2122260223 192.168.1.2 54321 typ host\r\n" * 40
+CANDIDATE = {"candidate": "candidate:1 1 udp 2122260223 192.168.1.2 54321 typ host", "sdpMid": "0", "sdpMLineIndex": 0}
+MESSAGES = {
+    "offer": {"type": "offer", "target": "bob", "sdp": {"type": "offer", "sdp": SDP}},
+    "candidate": {"type": "candidate", "target": "bob", "candidate": CANDIDATE},
+    "candidates": {"type": "candidates", "target": "bob", "candidates": [CANDIDATE] * 5},
+    "stats": {"type": "stats", "reports": [{"peer": "bob", "rtt": 42.0, "loss": 0.5, "jitter": 3.1, "kbps": 900}]},
+    "heartbeat": {"type": "heartbeat"},
+}
+
+
+class StubSocket:
+    """Hands out the same receive event forever"""
+
+    def __init__(self, data: str):
+        self.event = {"type": "websocket.receive", "text": data}
+
+    async def receive(self) -> dict:
+        return self.event
+
+
+async def untyped(meter: RateMeter, websocket: StubSocket):
+    """The receive loop step without validation, with handler bodies reduced to their field reads"""
+    message = frames.loads(frames.frame_data(await websocket.receive(), MAX_FRAME))
+    msg_type = message.get("type")
+    wait, scope = meter.check(msg_type)
+    if wait and await LIMITER.over_limit(msg_type, wait, scope) != ALLOW:
+        return
+    if msg_type == "offer":
+        target, sdp = message.get("target"), message.get("sdp")
+        if target:
+            return target, sdp
+    elif msg_type == "answer":
+        target, sdp = message.get("target"), message.get("sdp")
+        if target:
+            return target, sdp
+    elif msg_type == "candidate":
+        target, candidate = message.get("target"), message.get("candidate")
+        if target:
+            return target, candidate
+    elif msg_type == "candidates":
+        target, candidates = message.get("target"), message.get("candidates")
+        if target and isinstance(candidates, list) and candidates:
+            return target, candidates
+    elif msg_type == "sfu_publish":
+        return message.get("sdp")
+    elif msg_type == "sfu_answer":
+        return message.get("publisher"), message.get("sdp")
+    elif msg_type == "connected":
+        peer = message.get("peer")
+        if isinstance(peer, str):
+            return peer
+    elif msg_type == "stats":
+        return message.get("reports")
+    elif msg_type == "room_state_request":
+        return None
+    elif msg_type == "heartbeat":
+        return None
+
+
+def make_dispatcher() -> Dispatcher:
+    dispatcher = Dispatcher()
+
+    async def noop(context, message):
+        return None
+    for model in (Offer, IceCandidate, IceCandidates, Stats, Heartbeat):
+        dispatcher.on(model)(noop)
+    return dispatcher
+
+
+async def typed(dispatcher: Dispatcher, context: MessageContext, meter: RateMeter, websocket: StubSocket):
+    """The receive loop step in server.py"""
+    data = frames.frame_data(await websocket.receive(), MAX_FRAME)
+    message = dispatcher.decode(data)
+    msg_type = message["type"] if message is not None else None
+    wait, scope = meter.check(msg_type)
+    if wait and await LIMITER.over_limit(msg_type, wait, scope) != ALLOW:
+        return
+    if message is not None:
+        await dispatcher.dispatch(context, message)
+
+
+async def run_once(fn, *args) -> float:
+    """Seconds for ROUNDS messages, awaiting each one the way the receive loop does"""
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        await fn(*args)
+    return time.process_time() - start
+
+
+async def measure(*paths) -> List[float]:
+    """Best of REPEATS runs per path, in microseconds; the paths take turns so noise hits them alike"""
+    best = [float("inf")] * len(paths)
+    for _ in range(REPEATS):
+        for i, (fn, *args) in enumerate(paths):
+            best[i] = min(best[i], await run_once(fn, *args))
+    return [b / ROUNDS * 1e6 for b in best]
+
+
+async def compare():
+    dispatcher = make_dispatcher()
+    context = MessageContext(None, None, "alice", "room")
+    meter = LIMITER.meter("room", "alice")
+    for backend in ("json", "ujson", "orjson"):
+        if frames.select_backend(backend) != backend:
+            continue
+        print(f"\nJSON backend: {backend}, {ROUNDS} messages per cell")
+        print(f"{'message':>12} {'bytes':>6} {'untyped us':>11} {'typed us':>9} {'cost us':>9}")
+        for name, message in MESSAGES.items():
+            data = json.dumps(message)
+            websocket = StubSocket(data)
+            before, after = await measure((untyped, meter, websocket), (typed, dispatcher, context, meter, websocket))
+            print(f"{name:>12} {len(data):>6} {before:>11.2f} {after:>9.2f} {after - before:>+9.2f}")
+    frames.select_backend("auto")
+
+
+def run():
+    asyncio.run(compare())
+
+
+if __name__ == "__main__":
+    run()
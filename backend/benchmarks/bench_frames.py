@@ -0,0 +1,69 @@
+"""
+Microbenchmark: CPU time per broadcast, serializing per recipient versus
+encoding the frame once.
+
+Run from the backend directory:
+    python -m benchmarks.bench_frames
+"""
+import json
+import time
+from app.signaling import frames
+from app.signaling.frames import Frame
+from app.signaling.outbound import OutboundQueue
+
+ROOM_SIZES = [2, 10, 50, 200]
+BROADCASTS = 2000
+
+USER_JOINED = {"type": "user_joined", "username": "alice", "room_id": "3f9c2a6e-5b1d-4c7a-9e8f-1a2b3c4d5e6f"}
+OFFER = {
+    "type": "offer",
+    "from": "alice",
+    "sdp": {"type": "offer", "sdp": "v=0\r\no=- 4611731400430051336 2 IN IP4 127.0.0.1\r\n" + "a=candidate:1 1 udp 2122260223 192.168.1.2 54321 typ host\r\n" * 40},
+}
+
+
+class NullSocket:
+    async def send_text(self, data: str):
+        pass
+
+
+def make_queues(size: int):
+    return [OutboundQueue(NullSocket(), maxsize=BROADCASTS * 2) for _ in range(size)]
+
+
+def per_recipient(message: dict, queues):
+    for queue in queues:
+        queue.put(json.dumps(message), message["type"])
+
+
+def encode_once(message: dict, queues):
+    frame = Frame(message)
+    for queue in queues:
+        queue.put(frame.text, frame.type)
+
+
+def measure(strategy, message: dict, size: int) -> float:
+    queues = make_queues(size)
+    start = time.process_time()
+    for _ in range(BROADCASTS):
+        strategy(message, queues)
+        for queue in queues:
+            for lane in queue._lanes:
+                lane.clear()
+            queue._size = 0
+    return (time.process_time() - start) / BROADCASTS * 1e6
+
+
+def run():
+    print(f"JSON backend: {frames.JSON_BACKEND}, {BROADCASTS} broadcasts per cell")
+    for name, message in (("user_joined", USER_JOINED), ("offer", OFFER)):
+        print(f"\n{name} ({len(json.dumps(message))} bytes)")
+        print(f"{'room size':>10} {'per-recipient us':>18} {'encode-once us':>16} {'speedup':>9}")
+        for size in ROOM_SIZES:
+            before = measure(per_recipient, message, size)
+            after = measure(encode_once, message, size)
+            print(f"{size:>10} {before:>18.1f} {after:>16.1f} {before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,101 @@
+"""
+Memory benchmark: bytes of bookkeeping per idle signaling connection.
+
+  before       the old parallel dicts (rooms / room_users / outbound)
+  before+meta  the same plus a per-connection dict holding what a record
+               now carries (username, room, join time, counters)
+  after        ConnectionRegistry with __slots__ records and interned ids
+
+Run from the backend directory:
+    python -m benchmarks.bench_registry_memory
+"""
+import gc
+import time
+import tracemalloc
+from typing import Dict, Set
+from app.signaling.registry import ConnectionRegistry
+
+CONNECTION_COUNTS = [10_000, 50_000]
+ROOM_SIZE = 10
+
+
+class IdleSocket:
+    __slots__ = ("__weakref__",)
+
+
+class PlaceholderQueue:
+    pass
+
+
+def connection_ids(count: int):
+    # Ids arrive as fresh strings from the URL path and JWT on every connection
+    for i in range(count):
+        room_id = f"room-{i // ROOM_SIZE:08d}-5b1d-4c7a-9e8f-1a2b3c4d5e6f".encode().decode()
+        username = f"user_{i:08d}".encode().decode()
+        yield room_id, username
+
+
+def build_before(sockets, queue):
+    rooms: Dict[str, Dict[str, IdleSocket]] = {}
+    room_users: Dict[str, Set[str]] = {}
+    outbound: Dict[IdleSocket, PlaceholderQueue] = {}
+    for websocket, (room_id, username) in zip(sockets, connection_ids(len(sockets))):
+        if room_id not in rooms:
+            rooms[room_id] = {}
+            room_users[room_id] = set()
+        rooms[room_id][username] = websocket
+        room_users[room_id].add(username)
+        outbound[websocket] = queue
+    return rooms, room_users, outbound
+
+
+def build_before_with_metadata(sockets, queue):
+    rooms: Dict[str, Dict[str, IdleSocket]] = {}
+    room_users: Dict[str, Set[str]] = {}
+    outbound: Dict[IdleSocket, PlaceholderQueue] = {}
+    info: Dict[IdleSocket, dict] = {}
+    for websocket, (room_id, username) in zip(sockets, connection_ids(len(sockets))):
+        if room_id not in rooms:
+            rooms[room_id] = {}
+            room_users[room_id] = set()
+        rooms[room_id][username] = websocket
+        room_users[room_id].add(username)
+        outbound[websocket] = queue
+        info[websocket] = {
+            "username": username, "room_id": room_id, "joined_at": time.time(),
+            "messages_in": 0, "messages_out": 0,
+        }
+    return rooms, room_users, outbound, info
+
+
+def build_after(sockets, queue):
+    registry = ConnectionRegistry()
+    for websocket, (room_id, username) in zip(sockets, connection_ids(len(sockets))):
+        registry.add(websocket, username, room_id, queue)
+    return registry
+
+
+def measure(builder, count: int) -> float:
+    sockets = [IdleSocket() for _ in range(count)]
+    queue = PlaceholderQueue()
+    gc.collect()
+    tracemalloc.start()
+    state = builder(sockets, queue)
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del state
+    return used / count
+
+
+def run():
+    print(f"{'connections':>12} {'before':>8} {'before+meta':>12} {'after':>8}   (bytes per connection)")
+    for count in CONNECTION_COUNTS:
+        before = measure(build_before, count)
+        before_meta = measure(build_before_with_metadata, count)
+        after = measure(build_after, count)
+        print(f"{count:>12} {before:>8.0f} {before_meta:>12.0f} {after:>8.0f}")
+
+
+if __name__ == "__main__":
+    run()
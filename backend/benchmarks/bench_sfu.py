@@ -0,0 +1,118 @@
+"""
+SFU loopback: synthetic aiortc clients publish through the SelectiveForwarder
+on one machine, and we count what each of them receives.
+
+Every client uploads a single video track to the server and should get one
+downstream stream from each other participant, compared with N-1 uploads per
+client in the mesh. Viewers (webinar mode) upload nothing and receive one
+stream per publisher.
+
+Run from the backend directory (needs aiortc):
+    python -m benchmarks.bench_sfu [participants] [seconds] [viewers]
+"""
+import asyncio
+import sys
+import time
+from typing import Dict, List
+from app.signaling.sfu import SelectiveForwarder, AIORTC_AVAILABLE
+
+if AIORTC_AVAILABLE:
+    from aiortc import RTCPeerConnection, RTCSessionDescription, VideoStreamTrack
+
+
+class Client:
+    """A participant with a synthetic camera, speaking the sfu_* messages"""
+
+    def __init__(self, name: str, publishing: bool = True):
+        self.name = name
+        self.publishing = publishing
+        self.upstream = RTCPeerConnection()
+        if publishing:
+            self.upstream.addTrack(VideoStreamTrack())
+        self.downstream: Dict[str, RTCPeerConnection] = {}
+        self.frames: Dict[str, int] = {}
+        self.readers: List[asyncio.Task] = []
+
+    async def offer(self) -> dict:
+        await self.upstream.setLocalDescription(await self.upstream.createOffer())
+        return {"type": self.upstream.localDescription.type, "sdp": self.upstream.localDescription.sdp}
+
+    async def handle(self, sfu: SelectiveForwarder, room_id: str, message: dict):
+        if message["type"] == "sfu_published":
+            await self.upstream.setRemoteDescription(RTCSessionDescription(**message["sdp"]))
+        elif message["type"] == "sfu_offer":
+            publisher = message["publisher"]
+            pc = RTCPeerConnection()
+            self.downstream[publisher] = pc
+            self.frames[publisher] = 0
+
+            @pc.on("track")
+            def on_track(track):
+                self.readers.append(asyncio.ensure_future(self.count(publisher, track)))
+
+            await pc.setRemoteDescription(RTCSessionDescription(**message["sdp"]))
+            await pc.setLocalDescription(await pc.createAnswer())
+            answer = {"type": pc.localDescription.type, "sdp": pc.localDescription.sdp}
+            await sfu.answer(room_id, self.name, publisher, answer)
+
+    async def count(self, publisher: str, track):
+        while True:
+            try:
+                await track.recv()
+            except Exception:
+                return
+            self.frames[publisher] += 1
+
+    async def close(self):
+        for reader in self.readers:
+            reader.cancel()
+        await self.upstream.close()
+        for pc in self.downstream.values():
+            await pc.close()
+
+
+async def run(participants: int, seconds: float, viewers: int = 0):
+    room_id = "bench"
+    clients = {f"user{i}": Client(f"user{i}") for i in range(participants)}
+    clients.update({f"viewer{i}": Client(f"viewer{i}", publishing=False) for i in range(viewers)})
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    async def send(room, username, message):
+        await inbox.put((username, message))
+
+    async def pump():
+        while True:
+            username, message = await inbox.get()
+            await clients[username].handle(sfu, room_id, message)
+
+    sfu = SelectiveForwarder(send)
+    pump_task = asyncio.ensure_future(pump())
+
+    start = time.perf_counter()
+    for client in clients.values():
+        if client.publishing:
+            await sfu.publish(room_id, client.name, await client.offer())
+        else:
+            await sfu.watch(room_id, client.name)
+    print(f"{participants} publishers and {viewers} viewers negotiated in {time.perf_counter() - start:.2f}s")
+
+    await asyncio.sleep(seconds)
+
+    print(f"{'client':>8} {'uploads':>8} {'streams':>8} {'min fps':>8}")
+    for client in clients.values():
+        rates = [count / seconds for count in client.frames.values()]
+        print(f"{client.name:>8} {int(client.publishing):>8} {len(rates):>8} {min(rates, default=0):>8.1f}")
+
+    pump_task.cancel()
+    await sfu.close()
+    for client in clients.values():
+        await client.close()
+
+
+if __name__ == "__main__":
+    if not AIORTC_AVAILABLE:
+        sys.exit("aiortc is not installed")
+    participants = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    viewers = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    asyncio.run(run(participants, seconds, viewers))
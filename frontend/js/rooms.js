@@ -21,7 +21,7 @@ console.log('✅ Rooms.js: Set roomsModuleLoading = true');
 // ========================
 
 console.log('🔄 Rooms.js: Defining createRoom...');
-window.createRoom = async function createRoom(roomName) {
+window.createRoom = async function createRoom(roomName, mode = 'meeting') {
     const token = localStorage.getItem('authToken');
     
     try {
@@ -31,7 +31,7 @@ window.createRoom = async function createRoom(roomName) {
                 'Content-Type': 'application/json',
                 'Authorization': `Bearer ${token}`
             },
-            body: JSON.stringify({ name: roomName })
+            body: JSON.stringify({ name: roomName, mode: mode })
         });
         
         const data = await response.json();
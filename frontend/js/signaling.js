@@ -15,6 +15,14 @@ class SignalingClient {
         this.reconnectAttempts = 0;
         this.maxReconnectAttempts = 5;
         this.heartbeatInterval = null;
+        this.pendingCandidates = {};
+        this.candidateFlushDelay = 10; // ms to collect trickled candidates per target
+        this.resumeToken = null;
+        this.lastSeq = 0; // every message up to here has arrived
+        this.seenSeqs = new Set(); // arrived ahead of a gap (urgent messages overtake queued ones)
+        this.closing = false;
+        this.retryAfter = null; // seconds the server asked us to wait before rejoining
+        this.baseUrl = WS_BASE_URL; // the node that owns the room, once a server has pointed us there
     }
     
     connect() {
@@ -28,7 +36,11 @@ class SignalingClient {
                 }
                 
                 // Include token in WebSocket URL as query parameter
-                const wsUrl = `${WS_BASE_URL}/ws/signaling/${this.roomId}?token=${token}`;
+                let wsUrl = `${this.baseUrl}/ws/signaling/${this.roomId}?token=${token}`;
+                if (this.resumeToken) {
+                    // Ask the server to pick the session back up and replay what we missed
+                    wsUrl += `&resume=${this.resumeToken}&last_seq=${this.lastSeq}`;
+                }
                 console.log('Connecting to signaling server...');
                 
                 this.ws = new WebSocket(wsUrl);
@@ -50,11 +62,22 @@ class SignalingClient {
                     reject(error);
                 };
                 
-                this.ws.onclose = () => {
+                const ws = this.ws;
+                this.ws.onclose = (event) => {
+                    if (ws !== this.ws) {
+                        // A socket this client already replaced (the server closes it after a resume)
+                        return;
+                    }
                     console.log('WebSocket disconnected');
                     this.connected = false;
                     this.stopHeartbeat();
-                    this.handleDisconnect();
+                    if (event.code === 4409) {
+                        // This user joined the room from another tab or device; let that one have it
+                        this.closing = true;
+                    }
+                    if (!this.closing) {
+                        this.handleDisconnect();
+                    }
                 };
                 
             } catch (error) {
@@ -70,6 +93,38 @@ class SignalingClient {
             console.log('Received message:', message);
             
             const type = message.type;
+            if (message.seq !== undefined && !this.trackSeq(message.seq)) {
+                // Already handled; a resume replays everything after lastSeq
+                return;
+            }
+            if (type === 'session') {
+                this.resumeToken = message.resume_token;
+                if (!message.resumed) {
+                    // Fresh session - numbering starts over
+                    this.lastSeq = 0;
+                    this.seenSeqs.clear();
+                }
+            }
+            if (type === 'join_rejected') {
+                if (message.reason === 'room_full') {
+                    // Retrying will not help until someone leaves
+                    this.closing = true;
+                } else {
+                    this.retryAfter = message.retry_after;
+                }
+            }
+            if (type === 'redirect') {
+                // Another node owns the room; reconnect there straight away (a held session resumes there too)
+                this.baseUrl = message.url.replace(/\/$/, '');
+                this.retryAfter = 0;
+                return;
+            }
+            if (type === 'ping') {
+                // Server liveness check - any reply counts as activity
+                this.send({ type: 'pong' });
+                return;
+            }
+            
             if (this.messageHandlers[type]) {
                 this.messageHandlers[type](message);
             } else {
@@ -81,6 +136,23 @@ class SignalingClient {
         }
     }
     
+    trackSeq(seq) {
+        // Returns false for a message we have already seen
+        if (seq <= this.lastSeq || this.seenSeqs.has(seq)) {
+            return false;
+        }
+        this.seenSeqs.add(seq);
+        if (this.seenSeqs.size > 256) {
+            // Candidates shed on the server leave gaps that never fill; move past them
+            this.lastSeq = Math.min(...this.seenSeqs) - 1;
+        }
+        while (this.seenSeqs.has(this.lastSeq + 1)) {
+            this.lastSeq++;
+            this.seenSeqs.delete(this.lastSeq);
+        }
+        return true;
+    }
+    
     on(messageType, handler) {
         this.messageHandlers[messageType] = handler;
     }
@@ -122,11 +194,33 @@ class SignalingClient {
     }
     
     sendCandidate(targetUsername, candidate) {
-        this.send({
-            type: 'candidate',
-            target: targetUsername,
-            candidate: candidate
-        });
+        // Collect candidates trickled in quick succession and send them as one batch
+        if (!this.pendingCandidates[targetUsername]) {
+            this.pendingCandidates[targetUsername] = [];
+            setTimeout(() => this.flushCandidates(targetUsername), this.candidateFlushDelay);
+        }
+        this.pendingCandidates[targetUsername].push(candidate);
+    }
+    
+    flushCandidates(targetUsername) {
+        const candidates = this.pendingCandidates[targetUsername];
+        delete this.pendingCandidates[targetUsername];
+        
+        if (!candidates || candidates.length === 0) return;
+        
+        if (candidates.length === 1) {
+            this.send({
+                type: 'candidate',
+                target: targetUsername,
+                candidate: candidates[0]
+            });
+        } else {
+            this.send({
+                type: 'candidates',
+                target: targetUsername,
+                candidates: candidates
+            });
+        }
     }
     
     startHeartbeat() {
@@ -149,11 +243,19 @@ class SignalingClient {
             this.reconnectAttempts++;
             console.log(`Attempting to reconnect (${this.reconnectAttempts}/${this.maxReconnectAttempts})...`);
             
+            if (this.retryAfter !== 0) {
+                // Only a redirect pins the next attempt; otherwise let any node route us again
+                this.baseUrl = WS_BASE_URL;
+            }
+            // A busy server says when to come back; otherwise back off linearly
+            const delay = this.retryAfter !== null && this.retryAfter !== undefined
+                ? this.retryAfter * 1000 : 2000 * this.reconnectAttempts;
+            this.retryAfter = null;
             setTimeout(() => {
                 this.connect().catch(error => {
                     console.error('Reconnect failed:', error);
                 });
-            }, 2000 * this.reconnectAttempts);
+            }, delay);
         } else {
             console.error('Max reconnect attempts reached');
             if (this.messageHandlers['connection_lost']) {
@@ -164,8 +266,11 @@ class SignalingClient {
     
     disconnect() {
         this.stopHeartbeat();
+        this.closing = true;
         if (this.ws) {
-            this.ws.close();
+            // Tell the server this is a real leave, not a drop to hold the session for
+            this.send({ type: 'leave' });
+            this.ws.close(1000);
             this.ws = null;
         }
         this.connected = false;
@@ -41,7 +41,8 @@ async function initRoomWithDependencies() {
 // Configuration
 // ========================
 
-const ICE_SERVERS = {
+// Fallback until the server's configuration (with TURN credentials) arrives in room_state
+let iceConfiguration = {
     iceServers: [
         { urls: 'stun:stun.l.google.com:19302' },
         { urls: 'stun:stun1.l.google.com:19302' }
@@ -59,6 +60,14 @@ let localStream = null;
 let peerConnections = {};
 let isAudioEnabled = true;
 let isVideoEnabled = true;
+let rosterVersion = 0;
+let topology = 'mesh';
+let myRole = 'publisher'; // 'viewer' in a webinar unless we are a presenter
+let negotiationRoles = {}; // peer -> 'polite' | 'impolite', assigned by the server
+let publishConnection = null; // SFU mode: our single upstream to the server
+let statsInterval = null;
+let previousStats = {}; // peer -> counters from the last report, for deltas
+const STATS_INTERVAL_MS = 10000;
 
 // ========================
 // Initialization
@@ -95,6 +104,7 @@ async function initRoom() {
         // Connect to signaling server
         showStatus('Connecting to room...');
         await setupSignaling();
+        startStatsReporting();
         
         showStatus('Connected to room');
         
@@ -140,11 +150,24 @@ async function setupSignaling() {
     signalingClient = new SignalingClient(roomId, username);
     
     // Register message handlers
+    signalingClient.on('session', handleSession);
+    signalingClient.on('room_state', handleRoomState);
+    signalingClient.on('roster_delta', handleRosterDelta);
     signalingClient.on('user_joined', handleUserJoined);
     signalingClient.on('user_left', handleUserLeft);
     signalingClient.on('offer', handleOffer);
+    signalingClient.on('offer_suppressed', handleOfferSuppressed);
     signalingClient.on('answer', handleAnswer);
     signalingClient.on('candidate', handleCandidate);
+    signalingClient.on('candidates', handleCandidates);
+    signalingClient.on('topology_changed', handleTopologyChanged);
+    signalingClient.on('viewer_count', handleViewerCount);
+    signalingClient.on('layer_hint', handleLayerHint);
+    signalingClient.on('sfu_published', handleSfuPublished);
+    signalingClient.on('sfu_offer', handleSfuOffer);
+    signalingClient.on('sfu_unpublished', handleSfuUnpublished);
+    signalingClient.on('join_queued', handleJoinQueued);
+    signalingClient.on('join_rejected', handleJoinRejected);
     signalingClient.on('connection_lost', handleConnectionLost);
     
     // Connect to WebSocket
@@ -155,6 +178,85 @@ async function setupSignaling() {
 // Signaling Handlers
 // ========================
 
+function handleSession(message) {
+    // A resumed session replays whatever we missed, so existing peers stay up.
+    // A fresh one means the room saw us leave; the room_state that follows rebuilds every peer.
+    if (message.resumed) {
+        console.log(`Session resumed, ${message.replayed} message(s) replayed`);
+        return;
+    }
+    Object.keys(peerConnections).forEach(peerUsername => {
+        closePeerConnection(peerUsername);
+        removeRemoteVideo(peerUsername);
+    });
+    stopPublishing();
+}
+
+async function handleRoomState(message) {
+    // Snapshot of everyone already in the room, sent once when we join.
+    // The joiner offers to every existing member; they wait for our offer.
+    console.log(`Room state v${message.version}:`, message.users);
+    rosterVersion = message.version;
+    topology = message.topology || 'mesh';
+    myRole = message.role || 'publisher';
+    if (message.ice) {
+        iceConfiguration = { iceServers: message.ice.iceServers };
+    }
+    Object.assign(negotiationRoles, message.roles || {});
+    if (message.mode === 'webinar') {
+        handleViewerCount(message);
+    }
+    
+    // Drop peers that are no longer in the room (snapshot requested after a missed delta)
+    Object.keys(peerConnections)
+        .filter(peerUsername => !message.users.includes(peerUsername))
+        .forEach(peerUsername => {
+            closePeerConnection(peerUsername);
+            removeRemoteVideo(peerUsername);
+        });
+    
+    // SFU mode: publish once to the server, which offers us everyone else's streams
+    // (viewers only receive, so the server starts sending to them on its own)
+    if (topology === 'sfu') {
+        if (!publishConnection && myRole !== 'viewer') {
+            await startPublishing();
+        }
+        return;
+    }
+    
+    await Promise.all(message.users
+        .filter(peerUsername => peerUsername !== username && !peerConnections[peerUsername])
+        .map(async peerUsername => {
+            await createPeerConnection(peerUsername);
+            await createAndSendOffer(peerUsername);
+        }));
+}
+
+function handleRosterDelta(message) {
+    // Already covered by a newer snapshot or delta
+    if (message.version <= rosterVersion) return;
+    
+    // Missed a delta - ask for a fresh snapshot instead of guessing
+    if (message.from_version > rosterVersion) {
+        console.warn(`Roster gap: have v${rosterVersion}, delta starts at v${message.from_version}`);
+        signalingClient.send({ type: 'room_state_request' });
+        return;
+    }
+    
+    rosterVersion = message.version;
+    
+    message.removed
+        .filter(peerUsername => peerUsername !== username)
+        .forEach(peerUsername => handleUserLeft({ username: peerUsername }));
+    
+    // New peers got a room_state snapshot and will send us offers
+    const added = message.added.filter(peerUsername => peerUsername !== username);
+    if (added.length > 0) {
+        console.log('Users joined:', added);
+        showStatus(`${added.join(', ')} joined the room`);
+    }
+}
+
 async function handleUserJoined(message) {
     const peerUsername = message.username;
     
@@ -163,12 +265,9 @@ async function handleUserJoined(message) {
         return;
     }
     
+    // The new peer got a room_state snapshot and will send us an offer
     console.log('User joined:', peerUsername);
     showStatus(`${peerUsername} joined the room`);
-    
-    // Create peer connection and send offer
-    await createPeerConnection(peerUsername);
-    await createAndSendOffer(peerUsername);
 }
 
 function handleUserLeft(message) {
@@ -194,8 +293,20 @@ async function handleOffer(message) {
     }
     
     const pc = peerConnections[peerUsername];
+    if (message.role) {
+        negotiationRoles[peerUsername] = message.role;
+    }
     
     try {
+        // Both sides offered at once: the impolite peer keeps its offer, the polite one yields
+        if (pc.signalingState !== 'stable') {
+            if (negotiationRole(peerUsername) === 'impolite') {
+                console.log('Ignoring crossing offer from:', peerUsername);
+                return;
+            }
+            await pc.setLocalDescription({ type: 'rollback' });
+        }
+        
         await pc.setRemoteDescription(new RTCSessionDescription(offer));
         
         // Create and send answer
@@ -209,6 +320,23 @@ async function handleOffer(message) {
     }
 }
 
+async function handleOfferSuppressed(message) {
+    // The server dropped our offer because it crossed with the peer's; wait for theirs instead
+    const pc = peerConnections[message.target];
+    if (pc && pc.signalingState === 'have-local-offer') {
+        try {
+            await pc.setLocalDescription({ type: 'rollback' });
+        } catch (error) {
+            console.error('Failed to roll back offer:', error);
+        }
+    }
+}
+
+function negotiationRole(peerUsername) {
+    // Same rule the server uses, for peers we have not been told about yet
+    return negotiationRoles[peerUsername] || (username < peerUsername ? 'impolite' : 'polite');
+}
+
 async function handleAnswer(message) {
     const peerUsername = message.from;
     const answer = message.sdp;
@@ -243,6 +371,136 @@ async function handleCandidate(message) {
     }
 }
 
+async function handleCandidates(message) {
+    const peerUsername = message.from;
+    const candidates = message.candidates || [];
+    
+    console.log(`Received ${candidates.length} ICE candidates from:`, peerUsername);
+    
+    const pc = peerConnections[peerUsername];
+    
+    if (pc) {
+        for (const candidate of candidates) {
+            try {
+                await pc.addIceCandidate(new RTCIceCandidate(candidate));
+            } catch (error) {
+                console.error('Failed to add ICE candidate:', error);
+            }
+        }
+    }
+}
+
+async function handleTopologyChanged(message) {
+    if (message.topology === topology) return;
+    console.log(`Room switched from ${topology} to ${message.topology}`);
+    topology = message.topology;
+    
+    // Tear down whatever the old topology used
+    Object.keys(peerConnections).forEach(peerUsername => {
+        closePeerConnection(peerUsername);
+        removeRemoteVideo(peerUsername);
+    });
+    stopPublishing();
+    
+    if (topology === 'sfu') {
+        if (myRole !== 'viewer') {
+            await startPublishing();
+        }
+        return;
+    }
+    
+    // Back to mesh: rebuild every pair once, with the lower username making the offer.
+    // Viewers always offer, since presenters never negotiate with them first.
+    await Promise.all(message.users
+        .filter(peerUsername => peerUsername !== username && (myRole === 'viewer' || username < peerUsername))
+        .map(async peerUsername => {
+            await createPeerConnection(peerUsername);
+            await createAndSendOffer(peerUsername);
+        }));
+}
+
+async function handleLayerHint(message) {
+    // Server picked a video layer for one receiver; cap what we encode for that peer
+    const pc = peerConnections[message.receiver];
+    if (!pc) return;
+    
+    const sender = pc.getSenders().find(s => s.track && s.track.kind === 'video');
+    if (!sender) return;
+    
+    const parameters = sender.getParameters();
+    if (!parameters.encodings || parameters.encodings.length === 0) {
+        parameters.encodings = [{}];
+    }
+    parameters.encodings[0].maxBitrate = message.max_kbps * 1000;
+    parameters.encodings[0].scaleResolutionDownBy = message.scale_resolution_down_by;
+    
+    try {
+        await sender.setParameters(parameters);
+        console.log(`Sending ${message.layer} layer to ${message.receiver}`);
+    } catch (error) {
+        console.warn('Failed to apply layer hint:', error);
+    }
+}
+
+function handleViewerCount(message) {
+    // Webinar audiences are reported as a count, not one join at a time
+    console.log(`${message.viewers} viewer(s) watching`);
+    const counter = document.getElementById('viewerCount');
+    if (counter) {
+        counter.textContent = `${message.viewers} watching`;
+    }
+}
+
+async function handleSfuPublished(message) {
+    // Server's answer to our upstream offer
+    if (publishConnection) {
+        await publishConnection.setRemoteDescription(new RTCSessionDescription(message.sdp));
+    }
+}
+
+async function handleSfuOffer(message) {
+    // Server offers one other participant's stream; receive-only, keyed by publisher
+    const publisher = message.publisher;
+    closePeerConnection(publisher);
+    
+    const pc = new RTCPeerConnection(iceConfiguration);
+    peerConnections[publisher] = pc;
+    pc.ontrack = (event) => {
+        addRemoteVideo(publisher, event.streams[0] || new MediaStream([event.track]));
+    };
+    
+    try {
+        await pc.setRemoteDescription(new RTCSessionDescription(message.sdp));
+        await pc.setLocalDescription(await pc.createAnswer());
+        await waitForIceGathering(pc);
+        signalingClient.send({
+            type: 'sfu_answer',
+            publisher: publisher,
+            sdp: pc.localDescription
+        });
+    } catch (error) {
+        console.error('Failed to answer SFU offer:', error);
+    }
+}
+
+function handleSfuUnpublished(message) {
+    closePeerConnection(message.publisher);
+    removeRemoteVideo(message.publisher);
+}
+
+function handleJoinQueued(message) {
+    // Lots of people joining at once; the server lets us in shortly
+    showStatus(`Waiting to join (position ${message.position}, about ${Math.ceil(message.retry_after)}s)...`);
+}
+
+function handleJoinRejected(message) {
+    if (message.reason === 'room_full') {
+        showStatus('This room is full.', true);
+    } else {
+        showStatus('Server busy, retrying shortly...');
+    }
+}
+
 function handleConnectionLost() {
     showStatus('Connection lost. Please refresh the page.', true);
 }
@@ -254,13 +512,18 @@ function handleConnectionLost() {
 async function createPeerConnection(peerUsername) {
     console.log('Creating peer connection for:', peerUsername);
     
-    const pc = new RTCPeerConnection(ICE_SERVERS);
+    const pc = new RTCPeerConnection(iceConfiguration);
     peerConnections[peerUsername] = pc;
     
-    // Add local stream tracks
-    localStream.getTracks().forEach(track => {
-        pc.addTrack(track, localStream);
-    });
+    // Add local stream tracks; webinar viewers only receive
+    if (myRole === 'viewer') {
+        pc.addTransceiver('audio', { direction: 'recvonly' });
+        pc.addTransceiver('video', { direction: 'recvonly' });
+    } else {
+        localStream.getTracks().forEach(track => {
+            pc.addTrack(track, localStream);
+        });
+    }
     
     // Handle ICE candidates
     pc.onicecandidate = (event) => {
@@ -279,6 +542,11 @@ async function createPeerConnection(peerUsername) {
     pc.onconnectionstatechange = () => {
         console.log(`Connection state with ${peerUsername}:`, pc.connectionState);
         
+        if (pc.connectionState === 'connected') {
+            // Lets the server time this pair's setup from offer to media
+            signalingClient.send({ type: 'connected', peer: peerUsername });
+        }
+        
         if (pc.connectionState === 'disconnected' || pc.connectionState === 'failed') {
             closePeerConnection(peerUsername);
             removeRemoteVideo(peerUsername);
@@ -304,6 +572,43 @@ async function createAndSendOffer(peerUsername) {
     }
 }
 
+async function startPublishing() {
+    // One upstream connection carrying our tracks to the server
+    publishConnection = new RTCPeerConnection(iceConfiguration);
+    localStream.getTracks().forEach(track => {
+        publishConnection.addTransceiver(track, { direction: 'sendonly', streams: [localStream] });
+    });
+    
+    try {
+        await publishConnection.setLocalDescription(await publishConnection.createOffer());
+        // The server does not trickle, so send the offer with every candidate in it
+        await waitForIceGathering(publishConnection);
+        signalingClient.send({ type: 'sfu_publish', sdp: publishConnection.localDescription });
+    } catch (error) {
+        console.error('Failed to publish to SFU:', error);
+    }
+}
+
+function stopPublishing() {
+    if (publishConnection) {
+        publishConnection.close();
+        publishConnection = null;
+    }
+}
+
+function waitForIceGathering(pc) {
+    if (pc.iceGatheringState === 'complete') {
+        return Promise.resolve();
+    }
+    return new Promise(resolve => {
+        pc.addEventListener('icegatheringstatechange', () => {
+            if (pc.iceGatheringState === 'complete') {
+                resolve();
+            }
+        });
+    });
+}
+
 function closePeerConnection(peerUsername) {
     const pc = peerConnections[peerUsername];
     
@@ -311,6 +616,100 @@ function closePeerConnection(peerUsername) {
         pc.close();
         delete peerConnections[peerUsername];
     }
+    delete previousStats[peerUsername];
+}
+
+// ========================
+// Call Quality Reporting
+// ========================
+
+function startStatsReporting() {
+    statsInterval = setInterval(reportStats, STATS_INTERVAL_MS);
+}
+
+function stopStatsReporting() {
+    if (statsInterval) {
+        clearInterval(statsInterval);
+        statsInterval = null;
+    }
+}
+
+async function reportStats() {
+    // One compact report per peer connection: rtt/jitter in ms, loss in %, kbps received,
+    // bwe/send_bwe the browser's bandwidth estimates towards us and towards the peer
+    const connections = { ...peerConnections };
+    if (publishConnection) {
+        connections['sfu'] = publishConnection;
+    }
+    
+    const reports = [];
+    for (const [peer, pc] of Object.entries(connections)) {
+        try {
+            const report = summarizeStats(peer, await pc.getStats());
+            if (report) reports.push(report);
+        } catch (error) {
+            console.warn('getStats failed for', peer, error);
+        }
+    }
+    
+    if (reports.length > 0) {
+        signalingClient.send({ type: 'stats', reports: reports });
+    }
+}
+
+function summarizeStats(peer, stats) {
+    let rtt = null;
+    let bwe = null;
+    let sendBwe = null;
+    let jitter = null;
+    let packetsLost = 0;
+    let packetsReceived = 0;
+    let bytesReceived = 0;
+    
+    stats.forEach(stat => {
+        if (stat.type === 'candidate-pair' && stat.nominated && stat.currentRoundTripTime !== undefined) {
+            rtt = stat.currentRoundTripTime * 1000;
+            if (stat.availableIncomingBitrate !== undefined) {
+                bwe = stat.availableIncomingBitrate / 1000;
+            }
+            // Chrome leaves availableIncomingBitrate out and only exposes its transport-cc
+            // estimate on the sending side; the server applies it to the same pair from
+            // the other end, so layer selection works when no receiver reports bwe
+            if (stat.availableOutgoingBitrate !== undefined) {
+                sendBwe = stat.availableOutgoingBitrate / 1000;
+            }
+        } else if (stat.type === 'inbound-rtp') {
+            packetsLost += stat.packetsLost || 0;
+            packetsReceived += stat.packetsReceived || 0;
+            bytesReceived += stat.bytesReceived || 0;
+            if (stat.kind === 'video' && stat.jitter !== undefined) {
+                jitter = stat.jitter * 1000;
+            }
+        }
+    });
+    
+    const now = Date.now();
+    const previous = previousStats[peer];
+    previousStats[peer] = { at: now, packetsLost, packetsReceived, bytesReceived };
+    
+    const report = { peer: peer };
+    if (rtt !== null) report.rtt = Math.round(rtt);
+    if (bwe !== null) report.bwe = Math.round(bwe);
+    if (sendBwe !== null) report.send_bwe = Math.round(sendBwe);
+    if (jitter !== null) report.jitter = Math.round(jitter);
+    if (previous) {
+        const lost = packetsLost - previous.packetsLost;
+        const received = packetsReceived - previous.packetsReceived;
+        if (lost + received > 0) {
+            report.loss = Math.max(0, lost) * 100 / (lost + received);
+        }
+        const seconds = (now - previous.at) / 1000;
+        if (seconds > 0) {
+            report.kbps = Math.round((bytesReceived - previous.bytesReceived) * 8 / seconds / 1000);
+        }
+    }
+    
+    return Object.keys(report).length > 1 ? report : null;
 }
 
 // ========================
@@ -381,6 +780,8 @@ function toggleVideo() {
 }
 
 async function endCall() {
+    stopStatsReporting();
+    
     // Stop local media
     if (localStream) {
         localStream.getTracks().forEach(track => track.stop());
@@ -390,6 +791,7 @@ async function endCall() {
     Object.keys(peerConnections).forEach(peerUsername => {
         closePeerConnection(peerUsername);
     });
+    stopPublishing();
     
     // Disconnect signaling
     if (signalingClient) {